@@ -1,4 +1,4 @@
-from typing import Dict, List
+from typing import Dict, List, Optional
 from openai import OpenAI
 from openai.types.chat import ChatCompletion
 import json
@@ -6,7 +6,9 @@ from dotenv import load_dotenv
 import os
 import logging
 from utils.data_models import SearchPreferences, ProductInfo, AgentContext
+from utils.serialization import dumps, tool_product_codec, tool_summary_codec
 from tools.scraper_integration import ScraperManager
+from agent.vanilla_agents.query_planner import QueryPlanner
 
 load_dotenv()
 logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -58,6 +60,10 @@ tools = [{
                 "is_prime_eligible": {
                     "type": "boolean",
                     "description": "Whether the product is prime eligible"
+                },
+                "page": {
+                    "type": "integer",
+                    "description": "The page of search results to fetch, for when the user asks for more results of the same search"
                 }
             }
         }
@@ -65,11 +71,18 @@ tools = [{
 }]
 
 class AmazonShoppingAgent:
-    def __init__(self):
-        self.openai_client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-        self.context = AgentContext()
+    def __init__(self, context: Optional[AgentContext] = None, scraper_manager: Optional[ScraperManager] = None,
+                 openai_client: Optional[OpenAI] = None):
+        """
+        The OpenAI client and scraper manager can be passed in to share them between agents;
+        a scraper manager passed in is owned by the caller and is not closed with the agent.
+        """
+        self.openai_client = openai_client or OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+        self.context = context or AgentContext()
         self.tools = tools
-        self.scraper_manager = ScraperManager(headless=True)
+        self._owns_scraper_manager = scraper_manager is None
+        self.scraper_manager = scraper_manager or ScraperManager(headless=True)
+        self.planner = QueryPlanner()
 
     def _chat_completion(self, messages: List[Dict[str,str]]) -> ChatCompletion:
         response = self.openai_client.chat.completions.create(
@@ -88,7 +101,7 @@ class AmazonShoppingAgent:
         """
         This will ensure that the scraper is closed when the agent is destroyed.
         """
-        if hasattr(self, 'scraper_manager'):
+        if hasattr(self, 'scraper_manager') and self._owns_scraper_manager:
             self.scraper_manager.close()
 
     def process_query(self, user_query: str):
@@ -115,16 +128,20 @@ class AmazonShoppingAgent:
         Be judicious about when to search. Only perform a new search when truly necessary (such as when you cannot answer the 
         user's query based on the latest existing search results).
 
-        When including reviews in your response, make sure to include a summary of the reviews.
+        Products come with precomputed review summaries and pros/cons instead of raw review text. When including
+        reviews in your response, base your summary of the reviews on these.
         """
 
         try:
             if self.context.current_results:
-                results_summary = f"\nThe most recent search found {len(self.context.current_results)} products matching these criteria."
-                results_summary += "\nCurrent search results include:\n"
-                for product in self.context.current_results:
-                    results_summary += f"- {product.product_name} (Price: ${product.price}, Rating: {product.rating}/5, Prime Eligible: {product.is_prime_eligible}, Description: {product.description})"
-                system_prompt += results_summary
+                self.context.current_results = self.scraper_manager.refresh_from_prefetch(self.context.current_results)
+                lines = [
+                    f"\nThe most recent search found {len(self.context.current_results)} products matching these criteria.",
+                    "Current search results include:"
+                ]
+                for product, digest in zip(self.context.current_results, self._product_digests(self.context.current_results)):
+                    lines.append(f"- {digest.get('product_name')} (Price: ${product.price}, Rating: {product.rating}/5, Prime Eligible: {product.is_prime_eligible}, Description: {digest.get('description')}, Reviews: {digest.get('review_summary')}, Pros: {digest.get('pros')}, Cons: {digest.get('cons')})")
+                system_prompt += "\n".join(lines)
             response = self._chat_completion(
                 messages=[
                     {"role": "system", "content": system_prompt},
@@ -134,10 +151,14 @@ class AmazonShoppingAgent:
 
             assistant_message = response.choices[0].message
 
+            history_message = {"role": "assistant", "content": assistant_message.content}
+            if assistant_message.tool_calls:
+                # Plain dicts keep the history serializable when sessions are saved
+                history_message["tool_calls"] = [tool_call.model_dump() for tool_call in assistant_message.tool_calls]
             self.context.conversation_history.extend([
                 {"role": "system", "content": system_prompt},
                 {"role": "user", "content": user_query},
-                {"role": "assistant", "content": assistant_message.content, "tool_calls": assistant_message.tool_calls}
+                history_message
             ])
 
             if hasattr(assistant_message, "tool_calls") and assistant_message.tool_calls:
@@ -146,14 +167,18 @@ class AmazonShoppingAgent:
                     args = json.loads(tool_call.function.arguments)
 
                     if tool_name == "search_amazon":
-                        search_results = self._search_amazon_tool(**args)
+                        search_preferences = SearchPreferences(**args)
+                        search_results = self.planner.plan(search_preferences, self.context, self.scraper_manager)
+                        if search_results is None:
+                            search_results = self._search_amazon_tool(**args)
+                            self.planner.record_search(search_preferences, search_results)
                         self.context.current_results = search_results
                         self.context.has_active_search = True
-                        self.context.current_preferences = SearchPreferences(**args)
+                        self.context.current_preferences = search_preferences
                         self.context.conversation_history.append({
                             "role": "tool",
                             "name": "search_amazon",
-                            "content": json.dumps([product.model_dump() for product in search_results]),
+                            "content": dumps(self._product_digests(search_results)),
                             "tool_call_id": tool_call.id
                         })
                 final_prompt = """
@@ -171,8 +196,10 @@ class AmazonShoppingAgent:
                     "content": final_content
                 })
                 
+                self._schedule_prefetch()
                 return final_content
             else:
+                self._schedule_prefetch()
                 return assistant_message.content
 
         except Exception as e:
@@ -180,6 +207,13 @@ class AmazonShoppingAgent:
             raise e
         
 
+    def _schedule_prefetch(self):
+        """
+        Use the idle time while the user reads the response to prefetch likely follow-up data.
+        """
+        if self.context.current_preferences and self.context.current_results:
+            self.scraper_manager.prefetch_follow_ups(self.context.current_preferences, self.context.current_results)
+
     def _search_amazon_tool(self, **kwargs) -> List[ProductInfo]:
         """
         Uses the Selenium AmazonScraper to search for products on Amazon
@@ -191,3 +225,16 @@ class AmazonShoppingAgent:
         except Exception as e:
             logger.error(f"Search tool error: {e}")
             return []
+
+    def _product_digests(self, products: List[ProductInfo]) -> List[Dict]:
+        """
+        Compact views of products for the model: precomputed summaries replace the raw description and reviews,
+        and every text field is truncated to its budget. Missing summaries are computed (and saved) in one batch.
+        """
+        summaries = self.scraper_manager.summary_store.summarize_batch(products)
+        digests = tool_product_codec.encode_many(products)
+        for digest, summary in zip(digests, tool_summary_codec.encode_many([summaries[product.key()] for product in products])):
+            digest.update(summary)
+            if "description_summary" in digest:
+                digest["description"] = digest.pop("description_summary")
+        return digests
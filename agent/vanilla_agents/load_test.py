@@ -0,0 +1,225 @@
+"""
+Load test for the session server: simulated users hold concurrent conversations against an in-process
+server whose OpenAI client and scraper are local stand-ins with configurable latency.
+
+Run from the repository root:
+    python -m agent.vanilla_agents.load_test --users 50 --turns 4
+"""
+import argparse
+import asyncio
+import json
+import logging
+import queue
+import random
+import statistics
+import tempfile
+import threading
+import time
+import urllib.request
+import uuid
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List
+
+from openai.types.chat import ChatCompletion
+from websockets.asyncio.client import connect
+
+from agent.vanilla_agents.session_server import SessionServer
+from tools.review_summarizer import SummaryStore
+from utils.data_models import ProductInfo, SearchPreferences
+
+QUERIES = ["coffee maker", "wireless headphones", "standing desk", "electric kettle", "mechanical keyboard"]
+FOLLOW_UPS = ["Which one has the best reviews?", "What's the cheapest option?", "Is the first one Prime eligible?"]
+
+
+class StandInOpenAI:
+    def __init__(self, latency: float = 0.3):
+        """
+        Mimics the chat completions API: asks for a search when the latest user message looks like
+        a new product request and otherwise answers directly.
+        """
+        self.latency = latency
+        self.chat = self
+        self.completions = self
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def create(self, messages: List[Dict], **kwargs) -> ChatCompletion:
+        with self._lock:
+            self.calls += 1
+        time.sleep(random.uniform(0.5, 1.5) * self.latency)
+        last = messages[-1]
+        message = {"role": "assistant", "content": "Here is what I found."}
+        if last["role"] == "user" and last["content"].startswith("Find me"):
+            message = {
+                "role": "assistant",
+                "content": None,
+                "tool_calls": [{
+                    "id": f"call_{uuid.uuid4().hex[:12]}",
+                    "type": "function",
+                    "function": {"name": "search_amazon", "arguments": json.dumps({"query": last["content"][8:]})},
+                }],
+            }
+        return ChatCompletion.model_validate({
+            "id": f"chatcmpl-{uuid.uuid4().hex[:12]}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": "gpt-4o",
+            "choices": [{"index": 0, "finish_reason": "stop", "message": message}],
+        })
+
+
+class StandInSessionPool:
+    def __init__(self, size: int):
+        """
+        Mimics SessionPool: `size` browser sessions, each used by one search at a time.
+        Records the peak number in use, which should never exceed the size.
+        """
+        self.size = size
+        self._available: "queue.Queue[int]" = queue.Queue()
+        for session_id in range(size):
+            self._available.put(session_id)
+        self._lock = threading.Lock()
+        self.in_use = 0
+        self.peak_in_use = 0
+
+    @contextmanager
+    def session(self) -> Iterator[int]:
+        session_id = self._available.get()
+        with self._lock:
+            self.in_use += 1
+            self.peak_in_use = max(self.peak_in_use, self.in_use)
+        try:
+            yield session_id
+        finally:
+            with self._lock:
+                self.in_use -= 1
+            self._available.put(session_id)
+
+
+class StandInScraperManager:
+    def __init__(self, latency: float = 2.0, sessions: int = 2):
+        """
+        Mimics ScraperManager with synthetic products; each search occupies one pooled session for its latency.
+        """
+        self.latency = latency
+        self.summary_store = SummaryStore()
+        self.session_pool = StandInSessionPool(sessions)
+        self.searches = 0
+        self._lock = threading.Lock()
+
+    def search_amazon(self, search_preferences: SearchPreferences, owner: Any = None) -> List[ProductInfo]:
+        with self.session_pool.session():
+            with self._lock:
+                self.searches += 1
+            time.sleep(random.uniform(0.5, 1.5) * self.latency)
+        products = [
+            ProductInfo(
+                product_name=f"{search_preferences.query.title()} model {i}",
+                price=round(random.uniform(10, 300), 2),
+                rating=round(random.uniform(3, 5), 1),
+                is_prime_eligible=random.random() < 0.7,
+                description=f"A dependable {search_preferences.query}. Easy to set up and built to last.",
+                reviews=["Works great and was easy to set up.", "Stopped working after a month, disappointed."],
+                asin=f"B{random.randrange(10 ** 9):09d}",
+            )
+            for i in range(10)
+        ]
+        self.summary_store.summarize_batch(products)
+        return products
+
+    def refresh_from_prefetch(self, results: List[ProductInfo]) -> List[ProductInfo]:
+        return results
+
+    def prefetch_follow_ups(self, search_preferences: SearchPreferences, results: List[ProductInfo], owner: Any = None):
+        pass
+
+    def close(self):
+        pass
+
+
+async def simulated_user(port: int, user_id: str, turns: int, think_time: float, latencies: Dict[str, List[float]],
+                         errors: List[str]):
+    async with connect(f"ws://127.0.0.1:{port}/ws?user={user_id}", open_timeout=30) as websocket:
+        for turn in range(turns):
+            search = turn == 0 or random.random() < 0.25
+            message = f"Find me a {random.choice(QUERIES)}" if search else random.choice(FOLLOW_UPS)
+            started = time.perf_counter()
+            await websocket.send(json.dumps({"type": "query", "message": message}))
+            reply = json.loads(await websocket.recv())
+            latencies["search" if search else "follow-up"].append(time.perf_counter() - started)
+            if reply["type"] == "error":
+                errors.append(reply["message"])
+            await asyncio.sleep(random.uniform(0.5, 1.5) * think_time)
+
+
+def _fetch_json(url: str) -> Dict:
+    with urllib.request.urlopen(url) as response:
+        return json.loads(response.read())
+
+
+def _percentile(values: List[float], fraction: float) -> float:
+    values = sorted(values)
+    return values[int(fraction * (len(values) - 1))] if values else 0.0
+
+
+async def run(args):
+    openai_client = StandInOpenAI(latency=args.llm_latency)
+    scraper_manager = StandInScraperManager(latency=args.scrape_latency, sessions=args.scrape_capacity)
+    server = SessionServer(
+        scraper_manager,
+        openai_client,
+        session_dir=tempfile.mkdtemp(prefix="sessions-"),
+        idle_timeout=args.idle_timeout,
+        max_concurrent_turns=args.max_concurrent_turns,
+        auth_secret=None
+    )
+    ready = asyncio.Event()
+    server_task = asyncio.create_task(server.serve("127.0.0.1", 0, ready=ready))
+    await ready.wait()
+
+    latencies: Dict[str, List[float]] = {"search": [], "follow-up": []}
+    errors: List[str] = []
+    started = time.perf_counter()
+    await asyncio.gather(*[
+        simulated_user(server.port, f"user{i}", args.turns, args.think_time, latencies, errors)
+        for i in range(args.users)
+    ])
+    elapsed = time.perf_counter() - started
+
+    # Let the idle sessions age out to exercise eviction to disk
+    await asyncio.sleep(args.idle_timeout)
+    await server.evict_idle_sessions()
+    metrics = await asyncio.to_thread(_fetch_json, f"http://127.0.0.1:{server.port}/metrics")
+
+    server_task.cancel()
+    await asyncio.gather(server_task, return_exceptions=True)
+
+    turns = sum(len(values) for values in latencies.values())
+    print(f"{args.users} users x {args.turns} turns in {elapsed:.1f}s ({turns / elapsed:.1f} turns/s)")
+    for kind, values in latencies.items():
+        if values:
+            print(f"{kind} turn latency: p50 {statistics.median(values):.2f}s  p95 {_percentile(values, 0.95):.2f}s  "
+                  f"max {max(values):.2f}s  ({len(values)} turns)")
+    print(f"errors: {len(errors)}  LLM calls: {openai_client.calls}  searches: {scraper_manager.searches}  "
+          f"peak sessions in use: {scraper_manager.session_pool.peak_in_use}/{scraper_manager.session_pool.size}")
+    print(f"server metrics: {json.dumps(metrics, indent=2)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Drive the session server with simulated users")
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--turns", type=int, default=4)
+    parser.add_argument("--think-time", type=float, default=1.0, help="Mean seconds a user reads before the next turn")
+    parser.add_argument("--llm-latency", type=float, default=0.3, help="Mean seconds per stand-in LLM call")
+    parser.add_argument("--scrape-latency", type=float, default=0.5, help="Mean seconds per stand-in search")
+    parser.add_argument("--scrape-capacity", type=int, default=2, help="Stand-in browser sessions, and so concurrent searches")
+    parser.add_argument("--max-concurrent-turns", type=int, default=16)
+    parser.add_argument("--idle-timeout", type=float, default=2.0)
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.WARNING)
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
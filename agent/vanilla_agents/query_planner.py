@@ -0,0 +1,138 @@
+import logging
+import re
+import time
+from typing import List, Optional, Set
+
+import config
+from utils.data_models import AgentContext, PriceRange, ProductInfo, RatingRange, SearchPreferences
+
+logger = logging.getLogger(__name__)
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+_STOPWORDS = {"a", "an", "the", "for", "with", "of", "and", "to", "in", "on", "me", "some", "good", "best", "cheap"}
+
+
+def _normalize(query: str) -> Set[str]:
+    tokens = set()
+    for token in _TOKEN.findall(query.lower()):
+        if token in _STOPWORDS:
+            continue
+        if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+            token = token[:-1]
+        tokens.add(token)
+    return tokens
+
+
+def query_similarity(first: str, second: str) -> float:
+    """
+    Jaccard similarity of the normalized query tokens.
+    """
+    a, b = _normalize(first), _normalize(second)
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def _bound_within(new: Optional[float], old: Optional[float], lower: bool) -> bool:
+    if old is None:
+        return True
+    if new is None:
+        return False
+    return new >= old if lower else new <= old
+
+
+def filters_within(new: SearchPreferences, old: SearchPreferences) -> bool:
+    """
+    Whether every product matching `new` would also have matched `old`, i.e. the new price and rating
+    ranges lie inside the old ones and Prime is not dropped as a requirement.
+    """
+    new_price, old_price = new.price_range or PriceRange(), old.price_range or PriceRange()
+    new_rating, old_rating = new.rating_range or RatingRange(), old.rating_range or RatingRange()
+    return (
+        _bound_within(new_price.minPrice or None, old_price.minPrice or None, lower=True)
+        and _bound_within(new_price.maxPrice or None, old_price.maxPrice or None, lower=False)
+        and _bound_within(new_rating.minRating, old_rating.minRating, lower=True)
+        and _bound_within(new_rating.maxRating, old_rating.maxRating, lower=False)
+        and (new.is_prime_eligible or not old.is_prime_eligible)
+    )
+
+
+class QueryPlanner:
+    def __init__(self, similarity_threshold: float = config.PLANNER_QUERY_SIMILARITY,
+                 max_age: float = config.PLANNER_CACHE_MAX_AGE):
+        """
+        Decides locally whether a search the model asked for can be answered from results we already have:
+        the latest search results when the query is similar and the new filters are a subset of the old ones,
+        or fresh cached live results for a similar query. Nothing older than `max_age` seconds is reused.
+        """
+        self.similarity_threshold = similarity_threshold
+        self.max_age = max_age
+        self.avoided_scrapes = 0
+        self.planned_searches = 0
+        # The widest search actually fetched in this conversation, and when; narrower refinements are answered from it
+        self._base_preferences: Optional[SearchPreferences] = None
+        self._base_results: List[ProductInfo] = []
+        self._base_fetched_at = 0.0
+        # The conversation the base belongs to
+        self._context: Optional[AgentContext] = None
+
+    def plan(self, preferences: SearchPreferences, context: AgentContext, scraper_manager) -> Optional[List[ProductInfo]]:
+        """
+        Returns the results to reuse, or None if a search is needed.
+        """
+        self.planned_searches += 1
+        if (
+            context is not self._context
+            or context.current_preferences is None
+            or time.time() - self._base_fetched_at > self.max_age
+        ):
+            # The conversation was replaced (e.g. loaded from disk) or cleared, or the base has gone stale
+            self.record_search(None, [])
+            self._context = context
+        base_preferences = self._base_preferences
+        base_results = self._base_results
+        results = None
+        source = None
+
+        if (
+            base_preferences is not None
+            and base_results
+            and preferences.page == base_preferences.page
+            and query_similarity(preferences.query, base_preferences.query) >= self.similarity_threshold
+            and filters_within(preferences, base_preferences)
+        ):
+            results = [product for product in base_results if preferences.matches(product)]
+            source = "current results"
+
+        if not results and hasattr(scraper_manager, "cached_results"):
+            cached = scraper_manager.cached_results(
+                preferences.page,
+                lambda query: query_similarity(preferences.query, query) >= self.similarity_threshold,
+                max_age=self.max_age
+            )
+            if cached:
+                fetched_at, cached_results = cached
+                results = [product for product in cached_results if preferences.matches(product)]
+                source = "cached search results"
+                if results:
+                    self.record_search(preferences.model_copy(update={"price_range": PriceRange(), "rating_range": RatingRange(), "is_prime_eligible": False}),
+                                       cached_results, fetched_at)
+
+        if not results:
+            logger.info(f"Planner: searching for '{preferences.query}' ({self.avoided_scrapes}/{self.planned_searches} scrapes avoided)")
+            return None
+
+        self.avoided_scrapes += 1
+        logger.info(f"Planner: answered '{preferences.query}' from {source} with {len(results)} products, "
+                    f"skipping the scrape ({self.avoided_scrapes}/{self.planned_searches} scrapes avoided)")
+        return results
+
+    def record_search(self, preferences: Optional[SearchPreferences], results: List[ProductInfo],
+                      fetched_at: Optional[float] = None):
+        """
+        Remember a search that was actually fetched, at `fetched_at` (Unix time, defaulting to now),
+        as the base for later refinements.
+        """
+        self._base_preferences = preferences
+        self._base_results = results
+        self._base_fetched_at = time.time() if fetched_at is None else fetched_at
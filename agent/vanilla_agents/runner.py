@@ -1,4 +1,5 @@
 from autonomous_amazon_agent import AmazonShoppingAgent
+from utils.serialization import save_context, load_context
 import colorama
 from colorama import Fore, Style
 import logging
@@ -27,6 +28,7 @@ def print_welcome_message():
     print("- Ask follow-up questions about products")
     print("- Type 'exit', 'quit', or 'q' to end the conversation")
     print("- Type 'clear' to clear the conversation history")
+    print("- Type '/save <file>' or '/load <file>' to save or restore the conversation")
     print("- Type 'help' to see these instructions again")
     print(f"\n{Fore.GREEN}Example queries:{Style.RESET_ALL}")
     print("- Find me a coffee maker under $100 with good reviews")
@@ -43,6 +45,7 @@ def main():
 
         while True:
             user_input = input(f"{Fore.GREEN}You: {Style.RESET_ALL}")
+            command, _, path = user_input.strip().partition(' ')
             if user_input.lower() in ['exit', 'quit', 'q']:
                 print(f"{Fore.YELLOW}Exiting Amazon Shopping Assistant. Goodbye!{Style.RESET_ALL}")
                 break
@@ -55,6 +58,20 @@ def main():
             elif user_input.lower() == 'help':
                 print_welcome_message()
                 continue
+            elif command.lower() in ('/save', '/load'):
+                command, path = command.lower(), path.strip()
+                try:
+                    if not path:
+                        raise ValueError(f"no file given, use '{command} <file>'")
+                    if command == '/save':
+                        save_context(agent.context, path)
+                        print(f"{Fore.BLUE}Assistant: Conversation saved to {path}.{Style.RESET_ALL}")
+                    else:
+                        agent.context = load_context(path)
+                        print(f"{Fore.BLUE}Assistant: Conversation restored from {path}.{Style.RESET_ALL}")
+                except (OSError, ValueError) as e:
+                    print(f"{Fore.RED}Error: could not {command[1:]} conversation: {e}{Style.RESET_ALL}")
+                continue
             if not user_input.strip():
                 print(f"{Fore.YELLOW}Please enter a valid query.{Style.RESET_ALL}")
                 continue
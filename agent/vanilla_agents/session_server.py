@@ -0,0 +1,433 @@
+"""
+Multi-tenant WebSocket front end: many conversations served from one agent process.
+
+Each user gets an isolated AgentContext; all users share one OpenAI client and one scraper backend.
+Run from the repository root:
+    python -m agent.vanilla_agents.session_server --port 8765
+
+With AMAZON_AGENT_SECRET set, a user is identified only by a token signed with that secret:
+    python -m agent.vanilla_agents.session_server --issue-token alice
+and connects to ws://host:port/ws?token=<token> (or sends "Authorization: Bearer <token>").
+Without a secret the server is for a single trust domain: any client can act as any ?user=<id>,
+so it refuses to bind to anything but a loopback address.
+
+Send either plain text or {"type": "query", "message": "..."} / {"type": "clear"}.
+GET /metrics returns server metrics as JSON.
+"""
+import argparse
+import asyncio
+import hashlib
+import hmac
+import ipaddress
+import logging
+import os
+import re
+import statistics
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from http import HTTPStatus
+from typing import Any, Dict, Iterator, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+from openai import OpenAI
+from websockets.asyncio.server import ServerConnection, serve
+from websockets.exceptions import ConnectionClosed
+from websockets.http11 import Request
+
+import config
+from agent.vanilla_agents.autonomous_amazon_agent import AmazonShoppingAgent
+from tools.scraper_integration import ScraperManager
+from utils.data_models import AgentContext, ProductInfo, SearchPreferences
+from utils.serialization import dumps, load_context, loads, save_context
+
+logger = logging.getLogger(__name__)
+
+_TENANT_ID = re.compile(r"[^A-Za-z0-9_.-]")
+
+
+def issue_token(tenant_id: str, secret: str) -> str:
+    """
+    Access token for a tenant: the tenant id and an HMAC-SHA256 signature of it.
+    """
+    signature = hmac.new(secret.encode("utf-8"), tenant_id.encode("utf-8"), hashlib.sha256).hexdigest()
+    return f"{tenant_id}.{signature}"
+
+
+def verify_token(token: str, secret: str) -> Optional[str]:
+    """
+    Returns the tenant id a token was issued for, or None if the token is malformed or forged.
+    """
+    tenant_id, _, _ = token.rpartition(".")
+    if not tenant_id or _TENANT_ID.search(tenant_id) or len(tenant_id) > 64:
+        return None
+    return tenant_id if hmac.compare_digest(token, issue_token(tenant_id, secret)) else None
+
+
+def _is_loopback(host: str) -> bool:
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+class FairScraperGate:
+    def __init__(self, capacity: int = 2):
+        """
+        Admits at most `capacity` concurrent searches to the shared scraper backend, one per pooled browser session.
+        Waiting searches are granted round-robin across tenants, so one user issuing many
+        searches cannot starve the others.
+        """
+        self.capacity = capacity
+        self._condition = threading.Condition()
+        self._in_flight = 0
+        self._waiting: "OrderedDict[str, deque]" = OrderedDict()
+        self._ring: deque = deque()
+        self._granted = set()
+        self._admitted_total = 0
+
+    @contextmanager
+    def slot(self, tenant_id: str) -> Iterator[None]:
+        ticket = object()
+        with self._condition:
+            if tenant_id not in self._waiting:
+                self._waiting[tenant_id] = deque()
+                self._ring.append(tenant_id)
+            self._waiting[tenant_id].append(ticket)
+            self._dispatch()
+            while ticket not in self._granted:
+                self._condition.wait()
+            self._granted.discard(ticket)
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._in_flight -= 1
+                self._dispatch()
+
+    def _dispatch(self):
+        while self._in_flight < self.capacity and self._ring:
+            tenant_id = self._ring.popleft()
+            tickets = self._waiting[tenant_id]
+            self._granted.add(tickets.popleft())
+            self._in_flight += 1
+            self._admitted_total += 1
+            if tickets:
+                self._ring.append(tenant_id)
+            else:
+                del self._waiting[tenant_id]
+        self._condition.notify_all()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._condition:
+            return {
+                "capacity": self.capacity,
+                "in_flight": self._in_flight,
+                "queued": sum(len(tickets) for tickets in self._waiting.values()),
+                "queued_tenants": len(self._waiting),
+                "admitted_total": self._admitted_total,
+            }
+
+
+class TenantScraper:
+    def __init__(self, manager: ScraperManager, gate: FairScraperGate, tenant_id: str,
+                 turn_slots: threading.BoundedSemaphore):
+        """
+        Per-tenant view of the shared scraper manager: searches go through the fair gate, searches and
+        prefetching are tagged with the tenant so a search only cancels the tenant's own prefetching,
+        everything else is delegated, and closing it leaves the shared manager running.
+        A search hands its turn slot back while it waits for the gate and scrapes, so turns that only
+        talk to the model keep running.
+        """
+        self.manager = manager
+        self.gate = gate
+        self.tenant_id = tenant_id
+        self.turn_slots = turn_slots
+
+    def search_amazon(self, search_preferences: SearchPreferences) -> List[ProductInfo]:
+        self.turn_slots.release()
+        try:
+            with self.gate.slot(self.tenant_id):
+                return self.manager.search_amazon(search_preferences, owner=self.tenant_id)
+        finally:
+            self.turn_slots.acquire()
+
+    def prefetch_follow_ups(self, search_preferences: SearchPreferences, results: List[ProductInfo]):
+        self.manager.prefetch_follow_ups(search_preferences, results, owner=self.tenant_id)
+
+    def close(self):
+        pass
+
+    def __getattr__(self, name: str):
+        return getattr(self.manager, name)
+
+
+class TenantSession:
+    def __init__(self, tenant_id: str, agent: AmazonShoppingAgent):
+        self.tenant_id = tenant_id
+        self.agent = agent
+        self.lock = asyncio.Lock()
+        self.last_active = time.monotonic()
+        self.connections = 0
+
+
+class SessionServer:
+    def __init__(self, scraper_manager: ScraperManager, openai_client: OpenAI, session_dir: str = config.SERVER_SESSION_DIR,
+                 idle_timeout: float = config.SERVER_IDLE_TIMEOUT,
+                 max_concurrent_turns: int = config.SERVER_MAX_CONCURRENT_TURNS,
+                 max_searching_turns: int = config.SERVER_MAX_SEARCHING_TURNS,
+                 auth_secret: Optional[str] = config.SERVER_AUTH_SECRET):
+        """
+        Searches are admitted through a fair gate sized to the scraper manager's session pool, so every
+        admitted search has a browser of its own. At most `max_concurrent_turns` turns run agent code at once;
+        turns inside a search are not counted, up to `max_searching_turns` of them.
+        With `auth_secret` set, tenants are identified by signed tokens.
+        """
+        self.scraper_manager = scraper_manager
+        self.openai_client = openai_client
+        self.session_dir = session_dir
+        self.idle_timeout = idle_timeout
+        self.auth_secret = auth_secret
+        self.gate = FairScraperGate(scraper_manager.session_pool.size)
+        # Agent turns are blocking (OpenAI calls, scraping), so they run on a thread pool; a turn holds one of
+        # the slots while it runs agent code and hands it back while it searches
+        self.turn_slots = threading.BoundedSemaphore(max_concurrent_turns)
+        self.executor = ThreadPoolExecutor(max_workers=max_concurrent_turns + max_searching_turns,
+                                           thread_name_prefix="agent-turn")
+        self.sessions: Dict[str, TenantSession] = {}
+        self._turn_latencies: deque = deque(maxlen=1000)
+        self._counters = {
+            "connections_total": 0,
+            "turns_total": 0,
+            "turn_errors": 0,
+            "turns_in_flight": 0,
+            "sessions_evicted": 0,
+            "sessions_restored": 0,
+            "auth_failures": 0,
+        }
+
+    def _session_path(self, tenant_id: str) -> str:
+        return os.path.join(self.session_dir, f"{tenant_id}.json")
+
+    async def _get_session(self, tenant_id: str) -> TenantSession:
+        session = self.sessions.get(tenant_id)
+        if session is not None:
+            return session
+        context = AgentContext()
+        path = self._session_path(tenant_id)
+        if os.path.exists(path):
+            try:
+                context = await asyncio.to_thread(load_context, path)
+                self._counters["sessions_restored"] += 1
+            except (OSError, ValueError) as e:
+                logger.error(f"Could not restore session for {tenant_id}: {e}")
+        agent = AmazonShoppingAgent(
+            context=context,
+            scraper_manager=TenantScraper(self.scraper_manager, self.gate, tenant_id, self.turn_slots),
+            openai_client=self.openai_client
+        )
+        # Another coroutine may have created the session while the context was loading
+        session = self.sessions.setdefault(tenant_id, TenantSession(tenant_id, agent))
+        return session
+
+    async def _run_turn(self, session: TenantSession, message: str) -> str:
+        async with session.lock:
+            session.last_active = time.monotonic()
+            self._counters["turns_in_flight"] += 1
+            started = time.perf_counter()
+            try:
+                loop = asyncio.get_running_loop()
+                return await loop.run_in_executor(self.executor, self._process_query, session.agent, message)
+            except Exception:
+                self._counters["turn_errors"] += 1
+                raise
+            finally:
+                self._counters["turns_in_flight"] -= 1
+                self._counters["turns_total"] += 1
+                self._turn_latencies.append(time.perf_counter() - started)
+                session.last_active = time.monotonic()
+
+    def _process_query(self, agent: AmazonShoppingAgent, message: str) -> str:
+        with self.turn_slots:
+            return agent.process_query(message)
+
+    def _authenticate(self, request: Request) -> Optional[str]:
+        """
+        The tenant a connection request acts as, or None if it is not authenticated.
+        """
+        query = parse_qs(urlparse(request.path).query)
+        if self.auth_secret is None:
+            # Single trust domain: the client names its own tenant
+            return _TENANT_ID.sub("", query.get("user", [""])[0])[:64] or uuid.uuid4().hex
+        token = query.get("token", [""])[0]
+        authorization = request.headers.get("Authorization", "")
+        if authorization.startswith("Bearer "):
+            token = authorization[len("Bearer "):].strip()
+        return verify_token(token, self.auth_secret) if token else None
+
+    async def handle_connection(self, websocket: ServerConnection):
+        tenant_id = self._authenticate(websocket.request)
+        if tenant_id is None:
+            await websocket.close(code=1008, reason="Unauthorized")
+            return
+        self._counters["connections_total"] += 1
+        session = await self._get_session(tenant_id)
+        session.connections += 1
+        try:
+            async for raw in websocket:
+                if isinstance(raw, bytes):
+                    try:
+                        raw = raw.decode("utf-8")
+                    except UnicodeDecodeError:
+                        await websocket.send(dumps({"type": "error", "message": "Binary messages must be UTF-8 text"}))
+                        continue
+                try:
+                    payload = loads(raw) if raw.lstrip().startswith("{") else {"type": "query", "message": raw}
+                except ValueError:
+                    await websocket.send(dumps({"type": "error", "message": "Invalid JSON"}))
+                    continue
+                # The session may have been evicted while the connection sat idle
+                if self.sessions.get(tenant_id) is not session:
+                    session.connections -= 1
+                    session = await self._get_session(tenant_id)
+                    session.connections += 1
+
+                if payload.get("type") == "clear":
+                    async with session.lock:
+                        session.agent.context.clear()
+                    await websocket.send(dumps({"type": "response", "message": "Conversation history cleared."}))
+                    continue
+                message = str(payload.get("message", "")).strip()
+                if not message:
+                    await websocket.send(dumps({"type": "error", "message": "Please enter a valid query."}))
+                    continue
+                try:
+                    response = await self._run_turn(session, message)
+                    await websocket.send(dumps({"type": "response", "message": response}))
+                except ConnectionClosed:
+                    raise
+                except Exception as e:
+                    logger.error(f"Error processing query for {tenant_id}: {e}", exc_info=True)
+                    await websocket.send(dumps({"type": "error", "message": f"An error occurred: {e}"}))
+        except ConnectionClosed:
+            pass
+        finally:
+            session.connections -= 1
+
+    async def evict_idle_sessions(self):
+        """
+        Save sessions that have been idle longer than the timeout to disk and drop them from memory.
+        """
+        now = time.monotonic()
+        for tenant_id, session in list(self.sessions.items()):
+            if now - session.last_active < self.idle_timeout or session.lock.locked():
+                continue
+            try:
+                await asyncio.to_thread(save_context, session.agent.context, self._session_path(tenant_id))
+            except OSError as e:
+                logger.error(f"Could not save session for {tenant_id}: {e}")
+                continue
+            if self.sessions.get(tenant_id) is session and not session.lock.locked():
+                del self.sessions[tenant_id]
+                self._counters["sessions_evicted"] += 1
+
+    async def _eviction_loop(self):
+        while True:
+            await asyncio.sleep(max(1.0, self.idle_timeout / 4))
+            await self.evict_idle_sessions()
+
+    def metrics(self) -> Dict[str, Any]:
+        latencies = sorted(self._turn_latencies)
+        metrics: Dict[str, Any] = dict(self._counters)
+        metrics["sessions_active"] = len(self.sessions)
+        metrics["connections_open"] = sum(session.connections for session in self.sessions.values())
+        metrics["turn_latency_ms"] = {
+            "p50": statistics.median(latencies) * 1000 if latencies else 0.0,
+            "p95": latencies[int(0.95 * (len(latencies) - 1))] * 1000 if latencies else 0.0,
+            "max": latencies[-1] * 1000 if latencies else 0.0,
+        }
+        metrics["scraper_gate"] = self.gate.stats()
+        if hasattr(self.scraper_manager, "failure_stats"):
+            metrics["scraper_failures"] = self.scraper_manager.failure_stats()
+        return metrics
+
+    def process_request(self, connection: ServerConnection, request: Request):
+        """
+        Serve the plain HTTP endpoints; WebSocket upgrades to /ws fall through to the handshake.
+        """
+        path = urlparse(request.path).path
+        if path == "/metrics":
+            return connection.respond(HTTPStatus.OK, dumps(self.metrics()) + "\n")
+        if path == "/health":
+            return connection.respond(HTTPStatus.OK, "ok\n")
+        if path != "/ws":
+            return connection.respond(HTTPStatus.NOT_FOUND, "Not found\n")
+        if self._authenticate(request) is None:
+            self._counters["auth_failures"] += 1
+            return connection.respond(HTTPStatus.UNAUTHORIZED, "Unauthorized\n")
+        return None
+
+    async def serve(self, host: str = config.SERVER_HOST, port: int = config.SERVER_PORT,
+                    ready: Optional[asyncio.Event] = None):
+        """
+        Serve until cancelled, then persist every open session.
+        """
+        if self.auth_secret is None and not _is_loopback(host):
+            raise ValueError(f"Refusing to serve on {host} without AMAZON_AGENT_SECRET: "
+                             f"unauthenticated tenants are only safe on a loopback address")
+        eviction = asyncio.create_task(self._eviction_loop())
+        try:
+            async with serve(self.handle_connection, host, port, process_request=self.process_request) as server:
+                self.port = server.sockets[0].getsockname()[1]
+                logger.info(f"Session server listening on {host}:{self.port}")
+                if ready is not None:
+                    ready.set()
+                await asyncio.Future()
+        finally:
+            eviction.cancel()
+            for tenant_id, session in list(self.sessions.items()):
+                try:
+                    save_context(session.agent.context, self._session_path(tenant_id))
+                except OSError as e:
+                    logger.error(f"Could not save session for {tenant_id}: {e}")
+            self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the Amazon shopping agent to many users over WebSocket")
+    parser.add_argument("--host", default=config.SERVER_HOST)
+    parser.add_argument("--port", type=int, default=config.SERVER_PORT)
+    parser.add_argument("--scrape-capacity", type=int, default=config.SERVER_SCRAPE_CAPACITY,
+                        help="Browser sessions in the scraper pool, and so concurrent searches")
+    parser.add_argument("--issue-token", metavar="USER", help="Print an access token for USER and exit")
+    args = parser.parse_args()
+
+    if args.issue_token:
+        if not config.SERVER_AUTH_SECRET:
+            parser.error("AMAZON_AGENT_SECRET must be set to issue tokens")
+        tenant_id = _TENANT_ID.sub("", args.issue_token)[:64]
+        if not tenant_id:
+            parser.error("USER must contain letters, digits, '_', '.' or '-'")
+        print(issue_token(tenant_id, config.SERVER_AUTH_SECRET))
+        return
+
+    if not config.SERVER_AUTH_SECRET and not _is_loopback(args.host):
+        parser.error(f"refusing to serve on {args.host} without AMAZON_AGENT_SECRET; unauthenticated tenants are loopback-only")
+
+    scraper_manager = ScraperManager(headless=True, sessions=args.scrape_capacity)
+    server = SessionServer(scraper_manager, OpenAI(api_key=os.getenv("OPENAI_API_KEY")))
+    try:
+        asyncio.run(server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        scraper_manager.close()
+
+
+if __name__ == "__main__":
+    main()
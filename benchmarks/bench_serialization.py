@@ -0,0 +1,81 @@
+"""
+Microbenchmark of the lean serialization path against pydantic-based baselines.
+Every comparison encodes the same fields: the tool message excludes description, reviews and url on all paths.
+
+Run from the repository root:
+    python -m benchmarks.bench_serialization
+"""
+import json
+import random
+import timeit
+
+from utils.data_models import ProductInfo
+from utils.serialization import dumps, orjson, product_codec, tool_product_codec
+
+WORDS = "great coffee maker brews fast easy clean carafe leaks broke after months quiet sturdy value price".split()
+
+
+def _text(words: int) -> str:
+    return " ".join(random.choice(WORDS) for _ in range(words)) + "."
+
+
+def make_products(count: int):
+    return [
+        ProductInfo(
+            product_name=_text(12),
+            price=round(random.uniform(5, 300), 2),
+            rating=round(random.uniform(1, 5), 1),
+            is_prime_eligible=random.random() < 0.5,
+            description=_text(150) if i % 4 else None,
+            reviews=[_text(80) for _ in range(10)],
+            asin=f"B{i:09d}",
+            url=f"https://www.amazon.com/dp/B{i:09d}",
+        )
+        for i in range(count)
+    ]
+
+
+TOOL_MESSAGE_EXCLUDE = {"description", "reviews", "url"}
+
+
+def pydantic_tool_message(products):
+    return json.dumps([product.model_dump(exclude=TOOL_MESSAGE_EXCLUDE) for product in products])
+
+
+def pydantic_json_tool_message(products):
+    return "[" + ",".join(product.model_dump_json(exclude=TOOL_MESSAGE_EXCLUDE) for product in products) + "]"
+
+
+def lean_tool_message(products):
+    return dumps(tool_product_codec.encode_many(products))
+
+
+def pydantic_cache_roundtrip(products):
+    return [ProductInfo(**json.loads(line)) for line in [product.model_dump_json() for product in products]]
+
+
+def lean_cache_roundtrip(products):
+    from utils.serialization import loads
+    return [product_codec.decode(loads(line)) for line in [dumps(record) for record in product_codec.encode_many(products)]]
+
+
+def main():
+    random.seed(0)
+    print(f"orjson available: {orjson is not None}")
+    for count in (50, 500):
+        products = make_products(count)
+        print(f"\n{count} products")
+        for name, old, new in [
+            ("tool message", pydantic_tool_message, lean_tool_message),
+            ("tool message", pydantic_json_tool_message, lean_tool_message),
+            ("cache round trip", pydantic_cache_roundtrip, lean_cache_roundtrip),
+        ]:
+            repeat = max(1, 2000 // count)
+            old_time = min(timeit.repeat(lambda: old(products), number=repeat, repeat=3)) / repeat
+            new_time = min(timeit.repeat(lambda: new(products), number=repeat, repeat=3)) / repeat
+            print(f"  {name:17s} {old.__name__:27s} {old_time * 1000:8.2f} ms   lean {new_time * 1000:8.2f} ms   ({old_time / new_time:.1f}x)")
+        print(f"  tool message size: pydantic {len(pydantic_tool_message(products)):,} chars, lean {len(lean_tool_message(products)):,} chars")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+import os
+
+# Directory where precomputed data (summaries, indexes, harvested reviews) is persisted.
+DATA_DIR = os.getenv("AMAZON_AGENT_DATA_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".agent_data"))
+
+SUMMARY_STORE_PATH = os.path.join(DATA_DIR, "summaries.json")
+SUMMARY_MAX_SENTENCES = 3
+SUMMARY_MAX_PROS_CONS = 3
+
+PRODUCT_INDEX_PATH = os.path.join(DATA_DIR, "product_index")
+# A search is answered from the index when at least this many products clear the similarity threshold;
+# otherwise it falls back to live scraping.
+INDEX_MIN_RESULTS = 5
+# Index similarity is the weighted fraction of query terms a product mentions, counting a term found in the
+# name as 1, in the description as 0.5 and in the reviews as 0.3: 0.6 needs most query terms in the name
+INDEX_MIN_SIMILARITY = 0.6
+# Indexed products scraped longer ago than this many seconds are not served as search results
+INDEX_MAX_AGE = 3600.0
+
+# Seconds of idle time after a response before speculative prefetching starts using the browser.
+PREFETCH_IDLE_DELAY = 2.0
+PREFETCH_TOP_PRODUCTS = 3
+# Prefetched results older than this many seconds are discarded rather than served
+PREFETCH_RESULT_TTL = 600.0
+
+REVIEW_STORE_PATH = os.path.join(DATA_DIR, "reviews.jsonl")
+REVIEW_HARVEST_MAX_PAGES = 5
+# Maximum number of harvested reviews fed into a product's summary
+REVIEW_SUMMARY_LIMIT = 50
+
+# Browser sessions in the one pool shared by live searches, prefetching and review harvesting
+SCRAPER_SESSIONS = 2
+SCRAPE_MAX_ATTEMPTS = 3
+SCRAPE_RETRY_BASE_DELAY = 2.0
+SCRAPE_RETRY_MAX_DELAY = 30.0
+# The circuit breaker opens when this fraction of the last CIRCUIT_BREAKER_WINDOW live requests hit a CAPTCHA
+CIRCUIT_BREAKER_WINDOW = 20
+CIRCUIT_BREAKER_BLOCK_RATE = 0.5
+CIRCUIT_BREAKER_COOLDOWN = 300.0
+STALE_CACHE_SIZE = 50
+
+SERVER_HOST = os.getenv("AMAZON_AGENT_HOST", "127.0.0.1")
+SERVER_PORT = int(os.getenv("AMAZON_AGENT_PORT", "8765"))
+SERVER_SESSION_DIR = os.path.join(DATA_DIR, "sessions")
+# Conversations idle for this many seconds are saved to disk and dropped from memory
+SERVER_IDLE_TIMEOUT = 900.0
+SERVER_MAX_CONCURRENT_TURNS = 16
+# Turns waiting for (or running) a search do not count against SERVER_MAX_CONCURRENT_TURNS; this many extra
+# threads are kept for them so that turns which only talk to the model never queue behind searches
+SERVER_MAX_SEARCHING_TURNS = 64
+# Browser sessions in the session server's scraper pool; also the number of concurrent searches admitted across all users
+SERVER_SCRAPE_CAPACITY = 2
+# Secret used to sign per-user access tokens. Without it the server trusts the ?user= parameter and only binds to localhost.
+SERVER_AUTH_SECRET = os.getenv("AMAZON_AGENT_SECRET")
+
+# The query planner reuses existing results when the new query is at least this similar (token Jaccard)
+PLANNER_QUERY_SIMILARITY = 0.75
+# Cached live results older than this many seconds are not reused by the planner
+PLANNER_CACHE_MAX_AGE = 3600.0
@@ -0,0 +1,82 @@
+import pytest
+
+from agent.vanilla_agents import query_planner
+from agent.vanilla_agents.query_planner import QueryPlanner, filters_within, query_similarity
+from utils.data_models import AgentContext, PriceRange, ProductInfo, RatingRange, SearchPreferences
+
+
+def preferences(query: str = "coffee maker", min_price=None, max_price=None, min_rating=None, prime=False) -> SearchPreferences:
+    return SearchPreferences(
+        query=query,
+        price_range=PriceRange(minPrice=min_price, maxPrice=max_price),
+        rating_range=RatingRange(minRating=min_rating),
+        is_prime_eligible=prime,
+    )
+
+
+@pytest.mark.parametrize("first, second, expected", [
+    ("coffee maker", "coffee maker", 1.0),
+    ("Coffee Makers", "coffee maker", 1.0),
+    ("the best coffee maker", "coffee maker", 1.0),
+    ("coffee maker", "espresso maker", 1 / 3),
+    ("wireless headphones", "coffee maker", 0.0),
+    ("glass", "glas", 0.0),
+    ("", "coffee maker", 0.0),
+])
+def test_query_similarity(first, second, expected):
+    assert query_similarity(first, second) == pytest.approx(expected)
+
+
+@pytest.mark.parametrize("new, old, expected", [
+    (preferences(), preferences(), True),
+    (preferences(max_price=50), preferences(), True),
+    (preferences(max_price=50), preferences(max_price=100), True),
+    (preferences(max_price=150), preferences(max_price=100), False),
+    (preferences(), preferences(max_price=100), False),
+    (preferences(min_price=20, max_price=80), preferences(min_price=10, max_price=100), True),
+    (preferences(min_price=5), preferences(min_price=10), False),
+    (preferences(min_rating=4.5), preferences(min_rating=4.0), True),
+    (preferences(min_rating=3.5), preferences(min_rating=4.0), False),
+    (preferences(prime=True), preferences(), True),
+    (preferences(), preferences(prime=True), False),
+])
+def test_filters_within(new, old, expected):
+    assert filters_within(new, old) is expected
+
+
+def products(n: int) -> list:
+    return [ProductInfo(product_name=f"coffee maker {i}", price=20.0 * (i + 1), rating=4.5, is_prime_eligible=True)
+            for i in range(n)]
+
+
+def searched(planner: QueryPlanner, context: AgentContext, search: SearchPreferences):
+    """
+    Records a fetched search the way the agent does.
+    """
+    assert planner.plan(search, context, scraper_manager=None) is None
+    planner.record_search(search, products(5))
+    context.current_preferences = search
+    context.current_results = products(5)
+
+
+def test_refinement_is_answered_from_the_base():
+    planner, context = QueryPlanner(), AgentContext()
+    searched(planner, context, preferences())
+    assert len(planner.plan(preferences(max_price=50), context, scraper_manager=None)) == 2
+
+
+def test_replaced_context_resets_the_base():
+    planner, context = QueryPlanner(), AgentContext()
+    searched(planner, context, preferences())
+    loaded = AgentContext()
+    loaded.current_preferences = preferences("espresso machine")
+    assert planner.plan(preferences(max_price=50), loaded, scraper_manager=None) is None
+
+
+def test_stale_base_is_not_reused(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(query_planner.time, "time", lambda: now[0])
+    planner, context = QueryPlanner(max_age=60.0), AgentContext()
+    searched(planner, context, preferences())
+    now[0] += 61.0
+    assert planner.plan(preferences(max_price=50), context, scraper_manager=None) is None
@@ -0,0 +1,88 @@
+import pytest
+
+from tools import resilience
+from tools.resilience import CircuitBreaker, FailureKind
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(resilience.time, "monotonic", clock)
+    return clock
+
+
+def tripped_breaker() -> CircuitBreaker:
+    breaker = CircuitBreaker(window=4, block_rate_threshold=0.5, min_calls=4, cooldown=60.0)
+    for outcome in (None, None, FailureKind.CAPTCHA, FailureKind.CAPTCHA):
+        assert breaker.allow()
+        breaker.record(outcome)
+    return breaker
+
+
+def test_stays_closed_below_block_rate(clock):
+    breaker = CircuitBreaker(window=4, block_rate_threshold=0.5, min_calls=4, cooldown=60.0)
+    for outcome in (None, None, None, FailureKind.CAPTCHA, FailureKind.TIMEOUT):
+        assert breaker.allow()
+        breaker.record(outcome)
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert not breaker.is_open()
+
+
+def test_opens_at_block_rate_and_refuses_until_cooldown(clock):
+    breaker = tripped_breaker()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.is_open()
+    assert not breaker.allow()
+    clock.now += 59.0
+    assert not breaker.allow()
+
+
+def test_is_open_does_not_take_the_trial_slot(clock):
+    breaker = tripped_breaker()
+    clock.now += 60.0
+    assert not breaker.is_open()
+    assert not breaker.is_open()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow()
+
+
+def test_single_trial_after_cooldown(clock):
+    breaker = tripped_breaker()
+    clock.now += 60.0
+    assert breaker.allow()
+    assert breaker.is_open()
+    assert not breaker.allow()
+
+
+def test_trial_success_closes(clock):
+    breaker = tripped_breaker()
+    clock.now += 60.0
+    assert breaker.allow()
+    breaker.record()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.block_rate() == 0.0
+    assert breaker.allow()
+
+
+@pytest.mark.parametrize("failure", list(FailureKind))
+def test_any_trial_failure_reopens_with_fresh_cooldown(clock, failure):
+    breaker = tripped_breaker()
+    clock.now += 60.0
+    assert breaker.allow()
+    breaker.record(failure)
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.is_open()
+    clock.now += 59.0
+    assert not breaker.allow()
+    clock.now += 1.0
+    assert breaker.allow()
+    breaker.record()
+    assert breaker.state == CircuitBreaker.CLOSED
@@ -0,0 +1,84 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+import config
+from tools.resilience import CircuitBreaker, FailureKind, ScraperError, failure_counters
+from tools.scraper_integration import ScraperManager
+from utils.data_models import ProductInfo, SearchPreferences
+
+
+@pytest.fixture
+def manager(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "SUMMARY_STORE_PATH", str(tmp_path / "summaries.json"))
+    monkeypatch.setattr(config, "PRODUCT_INDEX_PATH", str(tmp_path / "product_index"))
+    monkeypatch.setattr(config, "REVIEW_STORE_PATH", str(tmp_path / "reviews.jsonl"))
+    monkeypatch.setattr(config, "SCRAPE_MAX_ATTEMPTS", 1)
+    manager = ScraperManager(sessions=1)
+    yield manager
+    manager.close()
+
+
+def products(n: int) -> list:
+    return [
+        ProductInfo(product_name=f"usb cable {i}", price=10.0 + i, rating=4.5, is_prime_eligible=True, asin=f"B{i:09d}")
+        for i in range(n)
+    ]
+
+
+def live_results(monkeypatch, manager, *outcomes):
+    """
+    Make each live search return, or raise, the next of `outcomes`.
+    """
+    outcomes = iter(outcomes)
+
+    def live_search(search_preferences):
+        outcome = next(outcomes)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    monkeypatch.setattr(manager, "_live_search", live_search)
+
+
+def test_empty_scrape_does_not_replace_last_good_results(manager, monkeypatch):
+    live_results(monkeypatch, manager, products(3), [], ScraperError(FailureKind.TIMEOUT))
+    preferences = SearchPreferences(query="usb cable")
+
+    assert len(manager.search_amazon(preferences)) == 3
+    assert len(manager.search_amazon(preferences)) == 3
+    assert len(manager.search_amazon(preferences)) == 3
+    assert manager.failure_stats()["stale_served"] == 2
+
+
+def test_empty_scrape_is_not_a_breaker_success(manager, monkeypatch):
+    live_results(monkeypatch, manager, [])
+    breaker = manager.circuit_breaker
+    monkeypatch.setattr(breaker, "_state", CircuitBreaker.OPEN)
+    monkeypatch.setattr(breaker, "_opened_at", 0.0)
+    unknown = failure_counters.snapshot()[FailureKind.UNKNOWN.value]
+
+    assert manager.search_amazon(SearchPreferences(query="usb cable")) == []
+    assert breaker.state == CircuitBreaker.OPEN
+    assert failure_counters.snapshot()[FailureKind.UNKNOWN.value] == unknown + 1
+
+
+def test_real_search_preempts_another_owners_prefetch(manager, monkeypatch):
+    scraper = manager.session_pool._scrapers[0]
+    monkeypatch.setattr(scraper, "driver", SimpleNamespace(quit=lambda: None))
+    monkeypatch.setattr(scraper, "search_products", lambda *args, **kwargs: products(2))
+    monkeypatch.setattr(manager.prefetcher, "idle_delay", 0.0)
+    holding = threading.Event()
+
+    def hog(should_stop):
+        with manager.session_pool.session():
+            holding.set()
+            while not should_stop():
+                time.sleep(0.01)
+
+    manager.prefetcher.schedule(("search", "usb cable", 2), hog, owner="someone else")
+    assert holding.wait(5)
+    assert len(manager.search_amazon(SearchPreferences(query="usb cable"), owner="me")) == 2
+    assert manager.prefetcher.stats()["preempted"] == 1
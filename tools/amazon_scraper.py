@@ -1,7 +1,10 @@
 import time 
 import logging
 import random
-from typing import Optional
+import re
+from datetime import datetime
+from typing import Callable, Optional
+from urllib.parse import quote_plus
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
@@ -11,7 +14,8 @@ from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.common.by import By
 import undetected_chromedriver as uc
-from utils.data_models import ProductInfo
+from utils.data_models import ProductInfo, Review
+from .resilience import CaptchaDetected, FailureKind, ScraperError, as_scraper_error, classify_failure, failure_counters
 from typing import List
 
 logger = logging.getLogger(__name__)
@@ -23,6 +27,19 @@ logging.getLogger("httpx").disabled = True
 logging.getLogger('openai').disabled = True
 logging.getLogger('webdriver_manager').disabled = True
 
+ASIN_PATTERN = re.compile(r"/(?:dp|gp/product)/([A-Z0-9]{10})")
+
+CAPTCHA_MARKERS = ["validateCaptcha", "captchacharacters", "Type the characters you see in this image"]
+
+
+def extract_asin(url: str) -> Optional[str]:
+    """
+    Extract the ASIN from an Amazon product URL.
+    """
+    match = ASIN_PATTERN.search(url or "")
+    return match.group(1) if match else None
+
+
 class AmazonScraper:
     def __init__(self, headless: bool = True):
             """
@@ -46,6 +63,22 @@ class AmazonScraper:
         ]
         return random.choice(user_agents)
     
+    def is_blocked(self) -> bool:
+        """
+        Detect Amazon's CAPTCHA / robot check interstitial on the current page.
+        """
+        try:
+            if "Robot Check" in self.driver.title or "validateCaptcha" in self.driver.current_url:
+                return True
+            page_source = self.driver.page_source
+            return any(marker in page_source for marker in CAPTCHA_MARKERS)
+        except Exception:
+            return False
+
+    def _raise_if_blocked(self) -> None:
+        if self.is_blocked():
+            raise CaptchaDetected()
+
     def _search_for_product(self, product: str) -> None:
         try:
             search_box = WebDriverWait(self.driver, 10).until(
@@ -64,6 +97,23 @@ class AmazonScraper:
 
         except Exception as e:
             logging.error(f"Error while searching for {product}: {e}")
+            self._raise_if_blocked()
+            raise
+
+    def _open_results_page(self, product: str, page: int) -> None:
+        """
+        Open a given page of search results directly by URL.
+        """
+        try:
+            self.driver.get(f"{self.base_url}/s?k={quote_plus(product)}&page={page}")
+            WebDriverWait(self.driver, 10).until(
+                EC.presence_of_element_located((By.CSS_SELECTOR, "div.s-result-item"))
+            )
+            time.sleep(random.uniform(1.0, 2.5))
+
+        except Exception as e:
+            logging.error(f"Error while opening page {page} of results for {product}: {e}")
+            self._raise_if_blocked()
             raise
         
           
@@ -152,10 +202,12 @@ class AmazonScraper:
             logging.error(f"Error extracting product link: {e}")
             return ""
 
-    def _get_product_results(self) -> List[ProductInfo]:
+    def _get_product_results(self, should_stop: Optional[Callable[[], bool]] = None) -> List[ProductInfo]:
         """
         Extract product information by first collecting all product links,
         then visiting each product page individually.
+        If `should_stop` returns True between product visits, the products collected so far are returned.
+        Raises a ScraperError if the results page yields no product links.
         
         Returns:
             List[ProductInfo]: List of product information objects
@@ -182,7 +234,8 @@ class AmazonScraper:
                     
             if not product_elements:
                 logging.warning("No product elements found with any selector")
-                return []
+                self._raise_if_blocked()
+                raise ScraperError(FailureKind.NAVIGATION, "No product elements on the results page")
                 
             for product_element in product_elements[:10]:
                 link = self._extract_product_link(product_element)
@@ -191,19 +244,30 @@ class AmazonScraper:
                     
             logging.info(f"Collected {len(product_links)} product links")
             
+        except ScraperError:
+            raise
         except Exception as e:
             logging.error(f"Error collecting product links: {e}")
-            return []
+            self._raise_if_blocked()
+            raise as_scraper_error(e) from e
+
+        if not product_links:
+            self._raise_if_blocked()
+            raise ScraperError(FailureKind.NAVIGATION, "No product links on the results page")
         
         for i, link in enumerate(product_links):
+            if should_stop and should_stop():
+                logging.info(f"Stopping product extraction after {i}/{len(product_links)} products")
+                break
             try:
                 logging.info(f"Processing product {i+1}/{len(product_links)}")
                 
                 self.driver.get(link)
                 
                 time.sleep(random.uniform(2, 4))
+                self._raise_if_blocked()
                 
-                product_info = self._extract_product_info_from_page()
+                product_info = self._extract_product_info_from_page(link)
                 
                 if product_info:
                     products.append(product_info)
@@ -212,12 +276,17 @@ class AmazonScraper:
                 time.sleep(random.uniform(1, 3))
                 
             except Exception as e:
-                logging.error(f"Error processing product {i+1}: {e}")
+                kind = classify_failure(e)
+                # A block or a dead driver affects every remaining product, so let the caller handle it
+                if kind in (FailureKind.CAPTCHA, FailureKind.DRIVER_CRASH):
+                    raise
+                failure_counters.record(kind)
+                logging.error(f"Error processing product {i+1} ({kind.value}): {e}")
                 continue
         
         return products
     
-    def _extract_product_info_from_page(self) -> Optional[ProductInfo]:
+    def _extract_product_info_from_page(self, product_url: Optional[str] = None) -> Optional[ProductInfo]:
         """
         Extract all product information from a product detail page.
         """
@@ -352,7 +421,9 @@ class AmazonScraper:
                 rating=rating,
                 is_prime_eligible=is_prime_eligible,
                 description=description if description else None,
-                reviews=reviews if reviews else None
+                reviews=reviews if reviews else None,
+                asin=extract_asin(product_url or self.driver.current_url),
+                url=product_url or self.driver.current_url
             )
             
         except Exception as e:
@@ -370,6 +441,8 @@ class AmazonScraper:
                     return False
                 
                 logger.info("Starting WebDriver...")
+                # Every session gets a fresh user agent
+                self.user_agent = self._get_random_user_agent()
                 self.driver = self._setup_driver()
                 return True
             except Exception as e:
@@ -400,9 +473,12 @@ class AmazonScraper:
                 logger.error(f"Navigation error: {e}")
                 return False
             
-    def search_products(self, search_term: str, start_new_session: bool = True) -> List[ProductInfo]:
+    def search_products(self, search_term: str, start_new_session: bool = True, page: int = 1,
+                        should_stop: Optional[Callable[[], bool]] = None) -> List[ProductInfo]:
         """
         Search for products and return the product information.
+        Pages after the first are opened directly by URL.
+        Raises a ScraperError classifying the failure if the search cannot be completed.
         """
         driver_started = False
         
@@ -413,28 +489,106 @@ class AmazonScraper:
                 
                 if not self.start():
                     logging.error("Failed to start the WebDriver")
-                    return []
+                    raise ScraperError(FailureKind.DRIVER_CRASH, "Failed to start the WebDriver")
                 driver_started = True
                 
                 if not self.navigate_to_amazon():
                     logging.error("Failed to navigate to Amazon")
-                    return []
+                    self._raise_if_blocked()
+                    raise ScraperError(FailureKind.NAVIGATION, "Failed to navigate to Amazon")
             
-            self._search_for_product(search_term)
+            if page > 1:
+                self._open_results_page(search_term, page)
+            else:
+                self._search_for_product(search_term)
 
-            products = self._get_product_results()
+            products = self._get_product_results(should_stop)
             logger.info(f"[search_products] Found {len(products)} products: {products}")
             
             return products
         
         except Exception as e:
             logging.error(f"Error searching for products: {e}")
-            return []
+            if isinstance(e, ScraperError):
+                raise
+            raise as_scraper_error(e) from e
         
         finally:
             if start_new_session and driver_started:
                 self.close()
 
+    def _extract_reviews_from_page(self, asin: str) -> List[Review]:
+        """
+        Extract every review (text, star rating and date) on a reviews listing page.
+        """
+        reviews = []
+        for element in self.driver.find_elements(By.CSS_SELECTOR, "div[data-hook='review']"):
+            try:
+                text = ""
+                for selector in ["span[data-hook='review-body'] span", "span[data-hook='review-body']"]:
+                    try:
+                        text = element.find_element(By.CSS_SELECTOR, selector).text.strip()
+                        if text:
+                            break
+                    except:
+                        continue
+                if len(text) <= 10:
+                    continue
+
+                rating = None
+                for selector in ["i[data-hook='review-star-rating'] span.a-icon-alt", "i[data-hook='cmps-review-star-rating'] span.a-icon-alt"]:
+                    try:
+                        rating_element = element.find_element(By.CSS_SELECTOR, selector)
+                        rating_text = rating_element.text or rating_element.get_attribute("innerHTML")
+                        rating = float(rating_text.split(" ")[0])
+                        break
+                    except:
+                        continue
+
+                # Stored as an ISO date, or None when the date is missing or not in the expected format
+                date = None
+                try:
+                    date_text = element.find_element(By.CSS_SELECTOR, "span[data-hook='review-date']").text
+                    date = datetime.strptime(date_text.rsplit(" on ", 1)[-1].strip(), "%B %d, %Y").date().isoformat()
+                except:
+                    date = None
+
+                reviews.append(Review(asin=asin, text=text, rating=rating, date=date))
+            except Exception as e:
+                logging.warning(f"Error extracting review: {e}")
+                continue
+        return reviews
+
+    def fetch_reviews(self, asin: str, max_pages: int = 5,
+                      should_stop: Optional[Callable[[], bool]] = None) -> List[Review]:
+        """
+        Page through the product's reviews listing with the running driver, up to `max_pages` pages.
+        """
+        if self.driver is None:
+            logger.error("Driver not started. Call start() first.")
+            return []
+        reviews = []
+        for page in range(1, max_pages + 1):
+            if should_stop and should_stop():
+                break
+            try:
+                self.driver.get(f"{self.base_url}/product-reviews/{asin}/?pageNumber={page}")
+                time.sleep(random.uniform(1.5, 3))
+                self._raise_if_blocked()
+                page_reviews = self._extract_reviews_from_page(asin)
+                reviews.extend(page_reviews)
+                logging.info(f"Extracted {len(page_reviews)} reviews from page {page} for {asin}")
+                if not page_reviews or not self.driver.find_elements(By.CSS_SELECTOR, "li.a-last a"):
+                    break
+            except Exception as e:
+                kind = classify_failure(e)
+                if kind in (FailureKind.CAPTCHA, FailureKind.DRIVER_CRASH):
+                    raise
+                failure_counters.record(kind)
+                logging.error(f"Error fetching reviews page {page} for {asin}: {e}")
+                break
+        return reviews
+
     def close(self):
             """
             Close the WebDriver and release resources.
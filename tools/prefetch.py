@@ -0,0 +1,191 @@
+import heapq
+import itertools
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# A prefetch task receives a `should_stop` callable and returns its result, or None if it was stopped early.
+PrefetchTask = Callable[[Callable[[], bool]], Optional[Any]]
+
+
+def query_variants(query: str, limit: int = 2) -> List[str]:
+    """
+    Close variants of a search query that a follow-up turn is likely to ask for:
+    the query with its last word singularized or pluralized, and the query without its leading modifier.
+    """
+    words = query.strip().split()
+    if not words:
+        return []
+    variants = []
+    last = words[-1]
+    if last.endswith("ss"):
+        toggled = f"{last}es"
+    elif last.endswith("sses"):
+        toggled = last[:-2]
+    elif last.endswith("s") and len(last) > 3:
+        toggled = last[:-1]
+    else:
+        toggled = f"{last}s"
+    variants.append(" ".join(words[:-1] + [toggled]))
+    if len(words) > 2:
+        variants.append(" ".join(words[1:]))
+    return variants[:limit]
+
+
+class PrefetchScheduler:
+    def __init__(self, max_entries: int = 200, idle_delay: float = 2.0, ttl: float = 600.0):
+        """
+        Runs speculative fetches on a background thread while the user is reading a response.
+        Tasks run one at a time in priority order (lowest first) after `idle_delay` seconds without a
+        real request. Each task belongs to an owner (a conversation); `cancel(owner)` drops that owner's
+        pending tasks and stops its running one, leaving other owners' tasks queued.
+        Results are shared between owners and expire `ttl` seconds after they were fetched.
+        """
+        self.max_entries = max_entries
+        self.idle_delay = idle_delay
+        self.ttl = ttl
+        self._queue: List = []
+        self._queued_keys = set()
+        self._counter = itertools.count()
+        self._condition = threading.Condition()
+        # Set by every real request, restarting the quiet period before the next task
+        self._activity = threading.Event()
+        # (owner, stop event) of the task currently running, if any
+        self._running: Optional[Tuple[Hashable, threading.Event]] = None
+        # key -> (fetched_at, result)
+        self._results: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._used = set()
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+        self._stats = {"scheduled": 0, "completed": 0, "cancelled": 0, "failed": 0, "hits": 0, "misses": 0, "expired": 0,
+                       "preempted": 0}
+
+    def schedule(self, key: Hashable, task: PrefetchTask, priority: int = 0, owner: Hashable = None):
+        """
+        Queue a speculative fetch unless a fresh result is already cached or it is already queued.
+        """
+        with self._condition:
+            if self._closed or self._fresh(key) or key in self._queued_keys:
+                return
+            heapq.heappush(self._queue, (priority, next(self._counter), key, owner, task))
+            self._queued_keys.add(key)
+            self._stats["scheduled"] += 1
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="prefetch", daemon=True)
+                self._thread.start()
+            self._condition.notify()
+
+    def cancel(self, owner: Hashable = None):
+        """
+        Drop the owner's pending tasks and ask its running one to stop. Called when the owner makes a real request.
+        """
+        with self._condition:
+            kept = [entry for entry in self._queue if entry[3] != owner]
+            self._stats["cancelled"] += len(self._queue) - len(kept)
+            heapq.heapify(kept)
+            self._queue = kept
+            self._queued_keys = {entry[2] for entry in kept}
+            if self._running is not None and self._running[0] == owner:
+                self._running[1].set()
+            self._activity.set()
+
+    def preempt(self):
+        """
+        Ask the running task to stop whatever its owner, leaving queued tasks queued. Called when a real
+        request needs the browsers that speculative work is holding.
+        """
+        with self._condition:
+            if self._running is not None and not self._running[1].is_set():
+                self._running[1].set()
+                self._stats["preempted"] += 1
+            self._activity.set()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """
+        Look up a fresh prefetched result, counting the lookup as a hit or a miss.
+        """
+        with self._condition:
+            if self._fresh(key):
+                self._stats["hits"] += 1
+                self._used.add(key)
+                self._results.move_to_end(key)
+                return self._results[key][1]
+            self._stats["misses"] += 1
+            return None
+
+    def _fresh(self, key: Hashable) -> bool:
+        """
+        Whether a result is cached for `key` and has not expired; expired results are dropped.
+        Must be called with the condition held.
+        """
+        entry = self._results.get(key)
+        if entry is None:
+            return False
+        if time.monotonic() - entry[0] > self.ttl:
+            del self._results[key]
+            self._stats["expired"] += 1
+            return False
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        with self._condition:
+            stats = dict(self._stats)
+            lookups = stats["hits"] + stats["misses"]
+            stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+            stats["useful_fraction"] = len(self._used) / stats["completed"] if stats["completed"] else 0.0
+        return stats
+
+    def close(self):
+        with self._condition:
+            self._closed = True
+            self._queue.clear()
+            self._queued_keys.clear()
+            if self._running is not None:
+                self._running[1].set()
+            self._activity.set()
+            self._condition.notify()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._queue and not self._closed:
+                    self._condition.wait()
+                if self._closed:
+                    return
+                self._activity.clear()
+            # Give the users (and any real request) a moment before competing for the browsers
+            if self._activity.wait(self.idle_delay):
+                continue
+            with self._condition:
+                if self._closed or not self._queue:
+                    continue
+                _, _, key, owner, task = heapq.heappop(self._queue)
+                self._queued_keys.discard(key)
+                stop = threading.Event()
+                self._running = (owner, stop)
+
+            try:
+                result = task(stop.is_set)
+            except Exception as e:
+                logger.warning(f"Prefetch task {key} failed: {e}")
+                with self._condition:
+                    self._stats["failed"] += 1
+                continue
+            finally:
+                with self._condition:
+                    self._running = None
+
+            with self._condition:
+                if result is None or stop.is_set():
+                    self._stats["cancelled"] += 1
+                    continue
+                self._results[key] = (time.monotonic(), result)
+                self._results.move_to_end(key)
+                self._stats["completed"] += 1
+                while len(self._results) > self.max_entries:
+                    evicted, _ = self._results.popitem(last=False)
+                    self._used.discard(evicted)
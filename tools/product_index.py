@@ -0,0 +1,363 @@
+import logging
+import math
+import os
+import re
+import threading
+import time
+import zlib
+from collections import Counter
+from typing import Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+from utils.data_models import ProductInfo, SearchPreferences
+from utils.serialization import dumps, loads, product_codec
+
+logger = logging.getLogger(__name__)
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+_STOPWORDS = {
+    "a", "an", "the", "for", "with", "of", "and", "to", "in", "on", "by", "me", "some", "is", "it", "this",
+    "that", "i", "my", "was", "are", "but", "or", "so", "very", "you", "your", "be", "as", "at", "from",
+}
+
+
+def _tokens(text: str) -> List[str]:
+    tokens = []
+    for token in _TOKEN.findall((text or "").lower()):
+        if token in _STOPWORDS:
+            continue
+        if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+            token = token[:-1]
+        tokens.append(token)
+    return tokens
+
+
+def _terms(text: str) -> Set[str]:
+    return set(_tokens(text))
+
+
+class HashingEmbedder:
+    def __init__(self, dim: int = 2048, name_weight: float = 1.0, description_weight: float = 0.5,
+                 review_weight: float = 0.3, max_field_terms: int = 64):
+        """
+        Local lexical embedder using the hashing trick over normalized terms of a product's name,
+        description and reviews. A product vector holds, per hashed term, the weight of the most important
+        field it appears in; the `max_field_terms` most frequent description and review terms are kept.
+        A query spreads a total weight of 1 over its terms, so their dot product is the weighted fraction
+        of query terms the product mentions (up to hash collisions). This matches words, not meaning:
+        pass a different embedder with the same interface to ProductIndex for semantic retrieval.
+        Hashes are stable across processes so persisted vectors stay valid.
+        """
+        self.dim = dim
+        self.name_weight = name_weight
+        self.description_weight = description_weight
+        self.review_weight = review_weight
+        self.max_field_terms = max_field_terms
+
+    def _slot(self, term: str) -> int:
+        return zlib.crc32(term.encode("utf-8")) % self.dim
+
+    def _top_terms(self, text: str) -> List[str]:
+        return [term for term, _ in Counter(_tokens(text)).most_common(self.max_field_terms)]
+
+    def embed_product(self, product: ProductInfo) -> np.ndarray:
+        vector = np.zeros(self.dim, dtype=np.float32)
+        fields = [
+            (self._top_terms(" ".join(product.reviews or [])), self.review_weight),
+            (self._top_terms(product.description or ""), self.description_weight),
+            (_terms(product.product_name), self.name_weight),
+        ]
+        for terms, weight in fields:
+            for term in terms:
+                slot = self._slot(term)
+                vector[slot] = max(vector[slot], weight)
+        return vector
+
+    def embed_query(self, query: str) -> np.ndarray:
+        vector = np.zeros(self.dim, dtype=np.float32)
+        terms = _terms(query)
+        for term in terms:
+            vector[self._slot(term)] += 1.0 / len(terms)
+        return vector
+
+
+class ProductIndex:
+    # Column name -> (dtype, per-row shape); the vector column's shape is filled in from the embedder
+    COLUMNS = {
+        "vectors": (np.float32, None),
+        "prices": (np.float32, ()),
+        "ratings": (np.float32, ()),
+        "prime": (np.bool_, ()),
+        "scraped_at": (np.float64, ()),
+    }
+
+    def __init__(self, path: Optional[str] = None, embedder: Optional[HashingEmbedder] = None,
+                 ivf_threshold: int = 2000, nprobe: int = 8, initial_capacity: int = 256):
+        """
+        Vector index over every product ever scraped, with the time each row was last scraped.
+        Below `ivf_threshold` vectors the search is exact; above it an IVF coarse quantizer is trained
+        and only the `nprobe` closest lists are scanned.
+        With a `path`, every column is a raw file memory-mapped read-write and grown by doubling, so new rows
+        are written straight into the mapping; save() only appends new and updated products to products.jsonl,
+        flushes the mappings and records the row count in meta.json.
+        """
+        self.path = path
+        self.embedder = embedder or HashingEmbedder()
+        self.ivf_threshold = ivf_threshold
+        self.nprobe = nprobe
+        self._lock = threading.Lock()
+
+        self._columns: Dict[str, np.ndarray] = {}
+        self._size = 0
+        self._capacity = 0
+        self.products: List[ProductInfo] = []
+        self._rows: Dict[str, int] = {}
+        # Rows persisted by the last save, and rows updated in place since then
+        self._saved_size = 0
+        self._dirty_rows: Set[int] = set()
+        self._centroids_dirty = False
+
+        self.centroids: Optional[np.ndarray] = None
+        self.assignments: Optional[np.ndarray] = None
+        self._trained_size = 0
+
+        if path:
+            os.makedirs(path, exist_ok=True)
+            self.load()
+        if not self._columns:
+            self._allocate(initial_capacity)
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def vectors(self) -> np.ndarray:
+        return self._columns["vectors"][:self._size]
+
+    @property
+    def prices(self) -> np.ndarray:
+        return self._columns["prices"][:self._size]
+
+    @property
+    def ratings(self) -> np.ndarray:
+        return self._columns["ratings"][:self._size]
+
+    @property
+    def prime(self) -> np.ndarray:
+        return self._columns["prime"][:self._size]
+
+    @property
+    def scraped_at(self) -> np.ndarray:
+        return self._columns["scraped_at"][:self._size]
+
+    def _column_file(self, name: str) -> str:
+        return os.path.join(self.path, f"{name}.bin")
+
+    def _allocate(self, capacity: int):
+        """
+        Resizes every column to `capacity` rows, extending the backing files when persisted.
+        """
+        columns = {}
+        for name, (dtype, shape) in self.COLUMNS.items():
+            shape = (capacity,) + ((self.embedder.dim,) if shape is None else shape)
+            if self.path:
+                old = self._columns.get(name)
+                if isinstance(old, np.memmap):
+                    old.flush()
+                nbytes = int(np.prod(shape)) * np.dtype(dtype).itemsize
+                with open(self._column_file(name), "ab") as f:
+                    if f.tell() < nbytes:
+                        f.truncate(nbytes)
+                columns[name] = np.memmap(self._column_file(name), dtype=dtype, mode="r+", shape=shape)
+            else:
+                columns[name] = np.zeros(shape, dtype=dtype)
+                if name in self._columns:
+                    columns[name][:self._size] = self._columns[name][:self._size]
+        self._columns = columns
+        self._capacity = capacity
+
+    def add(self, products: List[ProductInfo], scraped_at: Optional[float] = None):
+        """
+        Adds products to the index, replacing the entry of any product that is already indexed.
+        `scraped_at` is the Unix time the products were scraped, defaulting to now.
+        """
+        if not products:
+            return
+        scraped_at = time.time() if scraped_at is None else scraped_at
+        with self._lock:
+            changed = []
+            for product in products:
+                row = self._rows.get(product.key())
+                if row is None:
+                    if self._size == self._capacity:
+                        self._allocate(max(2 * self._capacity, 1))
+                    row = self._size
+                    self._rows[product.key()] = row
+                    self.products.append(product)
+                    self._size += 1
+                else:
+                    self.products[row] = product
+                    if row < self._saved_size:
+                        self._dirty_rows.add(row)
+                self._columns["vectors"][row] = self.embedder.embed_product(product)
+                self._columns["prices"][row] = product.price
+                self._columns["ratings"][row] = product.rating
+                self._columns["prime"][row] = product.is_prime_eligible
+                self._columns["scraped_at"][row] = scraped_at
+                changed.append(row)
+
+            # Retrain the coarse quantizer once the index has grown by half since the last training
+            if self._size >= self.ivf_threshold and self._size > 1.5 * self._trained_size:
+                self._train()
+            elif self.centroids is not None:
+                assignments = np.resize(self.assignments, self._size)
+                assignments[changed] = self._assign(self._columns["vectors"][changed])
+                self.assignments = assignments
+        logger.info(f"Product index now holds {self._size} products")
+
+    def search(self, preferences: SearchPreferences, k: int = 10, min_similarity: float = 0.0,
+               max_age: Optional[float] = None) -> List[Tuple[ProductInfo, float]]:
+        """
+        Returns up to `k` (product, similarity) pairs that satisfy the price, rating and Prime filters
+        and, if `max_age` is given, were scraped no more than `max_age` seconds ago.
+        """
+        with self._lock:
+            if not self._size:
+                return []
+            mask = self._filter_mask(preferences)
+            if max_age is not None:
+                mask &= self.scraped_at >= time.time() - max_age
+            query = self.embedder.embed_query(preferences.query)
+            if self.centroids is not None and self.assignments is not None:
+                probe = np.argsort(self.centroids @ query)[::-1][:self.nprobe]
+                mask &= np.isin(self.assignments, probe)
+
+            candidates = np.flatnonzero(mask)
+            if candidates.size == 0:
+                return []
+            scores = self.vectors[candidates] @ query
+            top = np.argpartition(-scores, min(k, scores.size) - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+            return [
+                (self.products[candidates[i]], float(scores[i]))
+                for i in top if scores[i] >= min_similarity
+            ]
+
+    def _filter_mask(self, preferences: SearchPreferences) -> np.ndarray:
+        mask = np.ones(self._size, dtype=bool)
+        price_range = preferences.price_range
+        rating_range = preferences.rating_range
+        if price_range.minPrice is not None:
+            mask &= self.prices >= price_range.minPrice
+        if price_range.maxPrice is not None:
+            mask &= self.prices <= price_range.maxPrice
+        if rating_range.minRating is not None:
+            mask &= self.ratings >= rating_range.minRating
+        if rating_range.maxRating is not None:
+            mask &= self.ratings <= rating_range.maxRating
+        if preferences.is_prime_eligible:
+            mask &= self.prime
+        return mask
+
+    def _train(self, iterations: int = 10):
+        """
+        Trains the IVF coarse quantizer with spherical k-means.
+        """
+        n = self._size
+        vectors = self.vectors
+        nlist = max(1, int(math.sqrt(n)))
+        rng = np.random.default_rng(0)
+        centroids = np.array(vectors[rng.choice(n, nlist, replace=False)])
+        for _ in range(iterations):
+            assignments = np.argmax(vectors @ centroids.T, axis=1)
+            for c in range(nlist):
+                members = vectors[assignments == c]
+                if len(members):
+                    centroid = members.sum(axis=0)
+                    norm = np.linalg.norm(centroid)
+                    centroids[c] = centroid / norm if norm else centroid
+        self.centroids = centroids.astype(np.float32)
+        self.assignments = self._assign(vectors)
+        self._trained_size = n
+        self._centroids_dirty = True
+        logger.info(f"Trained IVF index with {nlist} lists over {n} products")
+
+    def _assign(self, vectors: np.ndarray) -> np.ndarray:
+        return np.argmax(vectors @ self.centroids.T, axis=1)
+
+    def save(self):
+        """
+        Persists what changed since the last save: new and updated products are appended to products.jsonl
+        (a later line for a row replaces an earlier one), the column mappings are flushed, and the row count
+        is recorded last so that a crash mid-save leaves the previous state readable.
+        """
+        if not self.path:
+            return
+        try:
+            with self._lock:
+                rows = sorted(self._dirty_rows) + list(range(self._saved_size, self._size))
+                if not rows and not self._centroids_dirty:
+                    return
+                # Start a fresh product log when nothing valid was loaded from disk
+                mode = "a" if self._saved_size else "w"
+                with open(os.path.join(self.path, "products.jsonl"), mode) as f:
+                    f.write("".join(dumps({"row": row, "product": product_codec.encode(self.products[row])}) + "\n"
+                                    for row in rows))
+                for column in self._columns.values():
+                    column.flush()
+                if self._centroids_dirty:
+                    tmp_path = os.path.join(self.path, "centroids.tmp.npy")
+                    np.save(tmp_path, self.centroids)
+                    os.replace(tmp_path, os.path.join(self.path, "centroids.npy"))
+                tmp_path = os.path.join(self.path, "meta.json.tmp")
+                with open(tmp_path, "w") as f:
+                    f.write(dumps({"size": self._size, "capacity": self._capacity, "dim": self.embedder.dim,
+                                   "trained_size": self._trained_size if self.centroids is not None else 0}))
+                os.replace(tmp_path, os.path.join(self.path, "meta.json"))
+                self._saved_size = self._size
+                self._dirty_rows.clear()
+                self._centroids_dirty = False
+        except OSError as e:
+            logger.error(f"Error saving product index: {e}")
+
+    def load(self):
+        """
+        Loads a persisted index, memory-mapping the column files.
+        """
+        meta_path = os.path.join(self.path, "meta.json")
+        if not os.path.exists(meta_path):
+            return
+        try:
+            with open(meta_path) as f:
+                meta = loads(f.read())
+            if meta["dim"] != self.embedder.dim:
+                logger.warning("Product index on disk has a different dimension, starting from an empty index")
+                return
+            size = meta["size"]
+            products: List[Optional[ProductInfo]] = [None] * size
+            with open(os.path.join(self.path, "products.jsonl")) as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    record = loads(line)
+                    # Lines past the recorded size come from a save that did not finish
+                    if record["row"] < size:
+                        products[record["row"]] = product_codec.decode(record["product"])
+            if any(product is None for product in products):
+                logger.warning("Product index on disk is inconsistent, starting from an empty index")
+                return
+            self._size = size
+            self._allocate(max(meta["capacity"], size, 1))
+            self.products = products
+            self._rows = {product.key(): row for row, product in enumerate(products)}
+            self._saved_size = size
+            centroids_path = os.path.join(self.path, "centroids.npy")
+            if meta.get("trained_size") and os.path.exists(centroids_path):
+                self.centroids = np.load(centroids_path)
+                self.assignments = self._assign(self.vectors)
+                self._trained_size = meta["trained_size"]
+            logger.info(f"Loaded product index with {size} products")
+        except (OSError, ValueError, KeyError) as e:
+            logger.error(f"Error loading product index: {e}")
+            self._columns, self._size, self.products, self._rows, self._saved_size = {}, 0, [], {}, 0
@@ -0,0 +1,196 @@
+import logging
+import random
+import threading
+import time
+from collections import Counter, deque
+from enum import Enum
+from typing import Any, Callable, Dict, Optional
+
+from selenium.common.exceptions import (
+    InvalidSessionIdException,
+    NoSuchWindowException,
+    StaleElementReferenceException,
+    TimeoutException,
+    WebDriverException,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class FailureKind(str, Enum):
+    CAPTCHA = "captcha"
+    TIMEOUT = "timeout"
+    STALE_ELEMENT = "stale_element"
+    DRIVER_CRASH = "driver_crash"
+    NAVIGATION = "navigation"
+    UNKNOWN = "unknown"
+
+
+class ScraperError(Exception):
+    def __init__(self, kind: FailureKind, message: str = ""):
+        super().__init__(message or kind.value)
+        self.kind = kind
+
+
+class CaptchaDetected(ScraperError):
+    def __init__(self, message: str = "Amazon served a CAPTCHA / robot check page"):
+        super().__init__(FailureKind.CAPTCHA, message)
+
+
+_DRIVER_CRASH_MESSAGES = ("chrome not reachable", "disconnected", "session deleted", "no such session", "target window already closed")
+
+
+def classify_failure(error: BaseException) -> FailureKind:
+    """
+    Map an exception raised while scraping to a failure class.
+    """
+    if isinstance(error, ScraperError):
+        return error.kind
+    if isinstance(error, TimeoutException):
+        return FailureKind.TIMEOUT
+    if isinstance(error, StaleElementReferenceException):
+        return FailureKind.STALE_ELEMENT
+    if isinstance(error, (InvalidSessionIdException, NoSuchWindowException)):
+        return FailureKind.DRIVER_CRASH
+    if isinstance(error, WebDriverException):
+        message = str(error).lower()
+        if any(fragment in message for fragment in _DRIVER_CRASH_MESSAGES):
+            return FailureKind.DRIVER_CRASH
+        if "timeout" in message or "timed out" in message:
+            return FailureKind.TIMEOUT
+        return FailureKind.NAVIGATION
+    return FailureKind.UNKNOWN
+
+
+def as_scraper_error(error: BaseException) -> ScraperError:
+    if isinstance(error, ScraperError):
+        return error
+    return ScraperError(classify_failure(error), str(error))
+
+
+class FailureCounters:
+    def __init__(self):
+        """
+        Thread-safe per-class failure counters.
+        """
+        self._counts = Counter()
+        self._lock = threading.Lock()
+
+    def record(self, kind: FailureKind):
+        with self._lock:
+            self._counts[kind.value] += 1
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            return {kind.value: self._counts[kind.value] for kind in FailureKind}
+
+
+# Process-wide counters, shared by every scraper and manager
+failure_counters = FailureCounters()
+
+
+class CircuitBreaker:
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, window: int = 20, block_rate_threshold: float = 0.5, min_calls: int = 4, cooldown: float = 300.0):
+        """
+        Opens when the fraction of blocked (CAPTCHA) requests among the last `window` requests reaches
+        `block_rate_threshold`. After `cooldown` seconds a single trial request is let through;
+        it closes the breaker on success and re-opens it, with a fresh cooldown, on any failure.
+        Every allow() that returns True must be followed by a record() of that request's outcome.
+        """
+        self.window = window
+        self.block_rate_threshold = block_rate_threshold
+        self.min_calls = min_calls
+        self.cooldown = cooldown
+        self._outcomes: deque = deque(maxlen=window)
+        self._state = self.CLOSED
+        self._opened_at = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.cooldown:
+                return self.HALF_OPEN
+            return self._state
+
+    def is_open(self) -> bool:
+        """
+        Whether live requests are currently refused. Unlike allow(), this never takes the trial slot.
+        """
+        with self._lock:
+            if self._state == self.OPEN:
+                return time.monotonic() - self._opened_at < self.cooldown
+            return self._state == self.HALF_OPEN
+
+    def allow(self) -> bool:
+        """
+        Whether a live request may be made right now. After the cooldown, the first caller gets the
+        single trial request and moves the breaker to half-open.
+        """
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.cooldown:
+                self._state = self.HALF_OPEN
+                return True
+            return False
+
+    def record(self, failure: Optional[FailureKind] = None):
+        """
+        Record the outcome of a live request: None for success, otherwise its failure class.
+        """
+        blocked = failure == FailureKind.CAPTCHA
+        with self._lock:
+            self._outcomes.append(blocked)
+            if self._state == self.HALF_OPEN:
+                if failure is None:
+                    self._state = self.CLOSED
+                    self._outcomes.clear()
+                else:
+                    self._trip()
+                return
+            if self._state == self.CLOSED and len(self._outcomes) >= self.min_calls:
+                if sum(self._outcomes) / len(self._outcomes) >= self.block_rate_threshold:
+                    self._trip()
+
+    def block_rate(self) -> float:
+        with self._lock:
+            return sum(self._outcomes) / len(self._outcomes) if self._outcomes else 0.0
+
+    def _trip(self):
+        self._state = self.OPEN
+        self._opened_at = time.monotonic()
+        logger.warning(f"Circuit breaker opened, pausing live scraping for {self.cooldown:.0f}s")
+
+
+def retry_with_backoff(
+    operation: Callable[[], Any],
+    attempts: int = 3,
+    base_delay: float = 2.0,
+    max_delay: float = 30.0,
+    retryable: Callable[[FailureKind], bool] = lambda kind: True,
+    on_failure: Optional[Callable[[FailureKind], None]] = None,
+) -> Any:
+    """
+    Run `operation`, retrying classified failures with full-jitter exponential backoff.
+    Raises the last failure as a ScraperError once attempts are exhausted or a failure is not retryable.
+    """
+    for attempt in range(1, attempts + 1):
+        try:
+            return operation()
+        except Exception as e:
+            error = as_scraper_error(e)
+            failure_counters.record(error.kind)
+            if on_failure:
+                on_failure(error.kind)
+            if attempt == attempts or not retryable(error.kind):
+                if error is e:
+                    raise
+                raise error from e
+            delay = random.uniform(0, min(max_delay, base_delay * 2 ** (attempt - 1)))
+            logger.warning(f"Attempt {attempt}/{attempts} failed ({error.kind.value}: {error}), retrying in {delay:.1f}s")
+            time.sleep(delay)
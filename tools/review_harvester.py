@@ -0,0 +1,161 @@
+import hashlib
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterator, List, Optional
+
+from utils.data_models import ProductInfo, Review
+from utils.serialization import dumps, loads
+from .resilience import CircuitBreaker, as_scraper_error, failure_counters
+from .session_pool import SessionPool
+
+logger = logging.getLogger(__name__)
+
+
+class ReviewStore:
+    def __init__(self, path: str):
+        """
+        Append-only on-disk store of harvested reviews, one compact JSON record per line.
+        Reviews are deduplicated by a hash of their product and text. Only the hashes and each product's
+        line offsets are kept in memory, so reading one product's reviews seeks straight to its lines.
+        """
+        self.path = path
+        self._seen = set()
+        self._offsets: Dict[str, List[int]] = {}
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._scan()
+
+    @staticmethod
+    def _fingerprint(asin: str, text: str) -> bytes:
+        return hashlib.blake2b(f"{asin}\0{' '.join(text.split())}".encode("utf-8"), digest_size=12).digest()
+
+    @staticmethod
+    def _decode(line: bytes) -> Optional[Review]:
+        try:
+            record = loads(line)
+        except ValueError:
+            return None
+        return Review(asin=record["a"], text=record["t"], rating=record.get("r"), date=record.get("d"))
+
+    def _scan(self):
+        """
+        Builds the fingerprint set and the per-product offset index with one pass over the file.
+        """
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "rb") as f:
+            offset = f.tell()
+            for line in iter(f.readline, b""):
+                review = self._decode(line)
+                if review is not None:
+                    self._seen.add(self._fingerprint(review.asin, review.text))
+                    self._offsets.setdefault(review.asin, []).append(offset)
+                offset = f.tell()
+
+    def append(self, reviews: List[Review]) -> int:
+        """
+        Appends reviews that have not been stored before and returns how many were new.
+        """
+        records = []
+        with self._lock:
+            for review in reviews:
+                fingerprint = self._fingerprint(review.asin, review.text)
+                if fingerprint in self._seen:
+                    continue
+                self._seen.add(fingerprint)
+                record = {"a": review.asin, "t": review.text}
+                if review.rating is not None:
+                    record["r"] = review.rating
+                if review.date:
+                    record["d"] = review.date
+                records.append((review.asin, (dumps(record) + "\n").encode("utf-8")))
+            if records:
+                with open(self.path, "ab") as f:
+                    offset = f.tell()
+                    for asin, line in records:
+                        self._offsets.setdefault(asin, []).append(offset)
+                        offset += len(line)
+                    f.write(b"".join(line for _, line in records))
+        return len(records)
+
+    def iter_reviews(self, asin: Optional[str] = None, newest_first: bool = False) -> Iterator[Review]:
+        """
+        Streams stored reviews from disk, optionally only those of one product.
+        """
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "rb") as f:
+            if asin is None:
+                for line in f:
+                    review = self._decode(line)
+                    if review is not None:
+                        yield review
+                return
+            with self._lock:
+                offsets = list(self._offsets.get(asin, []))
+            for offset in reversed(offsets) if newest_first else offsets:
+                f.seek(offset)
+                review = self._decode(f.readline())
+                if review is not None:
+                    yield review
+
+
+class ReviewHarvester:
+    def __init__(self, pool: SessionPool, store: ReviewStore, max_pages: int = 5,
+                 circuit_breaker: Optional[CircuitBreaker] = None):
+        """
+        Harvests reviews listings for many products concurrently over a shared session pool.
+        """
+        self.pool = pool
+        self.store = store
+        self.max_pages = max_pages
+        self.circuit_breaker = circuit_breaker
+
+    def harvest(self, products: List[ProductInfo], should_stop: Optional[Callable[[], bool]] = None) -> Dict[str, int]:
+        """
+        Fetches up to `max_pages` review pages per product and returns the number of new reviews stored per ASIN.
+        """
+        asins = list(dict.fromkeys(product.asin for product in products if product.asin))
+        if not asins:
+            return {}
+
+        def harvest_one(asin: str) -> int:
+            if should_stop and should_stop():
+                return 0
+            if self.circuit_breaker and not self.circuit_breaker.allow():
+                return 0
+            try:
+                with self.pool.session() as scraper:
+                    reviews = scraper.fetch_reviews(asin, max_pages=self.max_pages, should_stop=should_stop)
+            except Exception as e:
+                error = as_scraper_error(e)
+                failure_counters.record(error.kind)
+                if self.circuit_breaker:
+                    self.circuit_breaker.record(error.kind)
+                logger.error(f"Error harvesting reviews for {asin} ({error.kind.value}): {e}")
+                return 0
+            if self.circuit_breaker:
+                self.circuit_breaker.record()
+            return self.store.append(reviews)
+
+        with ThreadPoolExecutor(max_workers=min(self.pool.size, len(asins))) as executor:
+            counts = dict(zip(asins, executor.map(harvest_one, asins)))
+        logger.info(f"Harvested {sum(counts.values())} new reviews for {len(asins)} products")
+        return counts
+
+    def with_reviews(self, product: ProductInfo, limit: int = 50) -> ProductInfo:
+        """
+        Returns a copy of the product whose reviews are its `limit` most recently harvested ones, if any.
+        """
+        if not product.asin:
+            return product
+        reviews = []
+        for review in self.store.iter_reviews(product.asin, newest_first=True):
+            reviews.append(review.text)
+            if len(reviews) >= limit:
+                break
+        if not reviews:
+            return product
+        return product.model_copy(update={"reviews": reviews})
@@ -0,0 +1,218 @@
+import logging
+import math
+import os
+import re
+import threading
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+from utils.data_models import ProductInfo, ProductSummary
+from utils.serialization import dumps, loads, summary_codec
+
+logger = logging.getLogger(__name__)
+
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "but", "by", "for", "from", "had", "has", "have",
+    "i", "if", "in", "into", "is", "it", "its", "it's", "me", "my", "of", "on", "or", "so", "than",
+    "that", "the", "their", "them", "then", "there", "these", "they", "this", "to", "too", "was",
+    "we", "were", "what", "when", "which", "will", "with", "would", "you", "your", "very", "just",
+    "one", "all", "also", "can", "do", "does", "did", "get", "got", "been", "after", "about",
+}
+
+POSITIVE_WORDS = {
+    "great", "excellent", "good", "love", "loved", "loves", "perfect", "amazing", "awesome", "easy",
+    "comfortable", "sturdy", "durable", "quiet", "fast", "recommend", "best", "nice", "works",
+    "solid", "reliable", "quality", "happy", "worth", "value", "fantastic", "impressed", "favorite",
+}
+
+NEGATIVE_WORDS = {
+    "bad", "poor", "broke", "broken", "break", "cheap", "flimsy", "disappointed", "disappointing",
+    "waste", "terrible", "awful", "worst", "return", "returned", "refund", "loud", "slow", "stopped",
+    "defective", "leaks", "leaked", "hard", "difficult", "problem", "problems", "issue", "issues",
+    "junk", "unfortunately", "died", "fails", "failed", "useless",
+}
+
+NEGATIONS = {"not", "no", "never", "don't", "doesn't", "didn't", "isn't", "wasn't", "won't", "can't"}
+
+_SENTENCE_SPLIT = re.compile(r"(?<=[.!?])\s+|\n+")
+_TOKEN = re.compile(r"[a-z][a-z']+")
+
+
+def _split_sentences(text: str) -> List[str]:
+    sentences = []
+    for sentence in _SENTENCE_SPLIT.split(text or ""):
+        sentence = sentence.strip()
+        if len(sentence) > 15:
+            sentences.append(sentence)
+    return sentences
+
+
+def _tokenize(sentence: str) -> List[str]:
+    return [token for token in _TOKEN.findall(sentence.lower()) if token not in STOPWORDS]
+
+
+def _sentiment(tokens: List[str]) -> int:
+    """
+    Lexicon based polarity score for a single sentence, flipping the sign of words that follow a negation.
+    """
+    score = 0
+    negate = False
+    for token in tokens:
+        if token in NEGATIONS:
+            negate = True
+            continue
+        polarity = (token in POSITIVE_WORDS) - (token in NEGATIVE_WORDS)
+        score += -polarity if negate else polarity
+        if polarity:
+            negate = False
+    return score
+
+
+class TextRankSummarizer:
+    def __init__(self, max_sentences: int = 3, damping: float = 0.85, iterations: int = 30):
+        """
+        Extractive summarizer that ranks sentences with TextRank over TF-IDF cosine similarity.
+        """
+        self.max_sentences = max_sentences
+        self.damping = damping
+        self.iterations = iterations
+
+    def rank(self, sentences: List[List[str]], idf: Dict[str, float]) -> List[float]:
+        """
+        Returns a TextRank score for every tokenized sentence.
+        """
+        vectors = []
+        for tokens in sentences:
+            counts = Counter(tokens)
+            vector = {token: count * idf.get(token, 1.0) for token, count in counts.items()}
+            norm = math.sqrt(sum(weight * weight for weight in vector.values())) or 1.0
+            vectors.append({token: weight / norm for token, weight in vector.items()})
+
+        n = len(vectors)
+        weights = [[0.0] * n for _ in range(n)]
+        for i in range(n):
+            for j in range(i + 1, n):
+                small, large = (vectors[i], vectors[j]) if len(vectors[i]) < len(vectors[j]) else (vectors[j], vectors[i])
+                similarity = sum(weight * large.get(token, 0.0) for token, weight in small.items())
+                weights[i][j] = weights[j][i] = similarity
+
+        out_sums = [sum(row) or 1.0 for row in weights]
+        scores = [1.0 / n] * n if n else []
+        for _ in range(self.iterations):
+            scores = [
+                (1 - self.damping) / n + self.damping * sum(weights[j][i] * scores[j] / out_sums[j] for j in range(n))
+                for i in range(n)
+            ]
+        return scores
+
+    def summarize(self, sentences: List[str], idf: Dict[str, float]) -> List[str]:
+        """
+        Picks the top ranked sentences and returns them in their original order.
+        """
+        if len(sentences) <= self.max_sentences:
+            return sentences
+        scores = self.rank([_tokenize(sentence) for sentence in sentences], idf)
+        top = sorted(range(len(sentences)), key=lambda i: scores[i], reverse=True)[:self.max_sentences]
+        return [sentences[i] for i in sorted(top)]
+
+
+def extract_pros_cons(sentences: List[str], max_items: int = 3) -> Tuple[List[str], List[str]]:
+    """
+    Splits review sentences into pros and cons by sentiment, strongest first.
+    """
+    scored = [(_sentiment(_tokenize(sentence)), sentence) for sentence in sentences]
+    pros = [sentence for score, sentence in sorted(scored, key=lambda item: -item[0]) if score > 0]
+    cons = [sentence for score, sentence in sorted(scored, key=lambda item: item[0]) if score < 0]
+    return pros[:max_items], cons[:max_items]
+
+
+class SummaryStore:
+    def __init__(self, path: Optional[str] = None, max_sentences: int = 3, max_pros_cons: int = 3):
+        """
+        Precomputed review and description summaries, keyed by product ASIN.
+        Summaries are computed once when a product is scraped and persisted to `path` if given.
+        """
+        self.path = path
+        self.summarizer = TextRankSummarizer(max_sentences=max_sentences)
+        self.max_pros_cons = max_pros_cons
+        self._summaries: Dict[str, ProductSummary] = {}
+        self._lock = threading.Lock()
+        if path:
+            self.load()
+
+    def get(self, product: ProductInfo) -> Optional[ProductSummary]:
+        return self._summaries.get(product.key())
+
+    def summarize_batch(self, products: List[ProductInfo], refresh: bool = False) -> Dict[str, ProductSummary]:
+        """
+        Summarizes every product that does not already have a summary, or all of them if `refresh` is set.
+        IDF weights are computed once over the whole batch so that all products share one vocabulary pass.
+        """
+        pending = {}
+        for product in products:
+            if refresh or product.key() not in self._summaries:
+                pending[product.key()] = product
+        if pending:
+            split = {}
+            document_frequency = Counter()
+            for key, product in pending.items():
+                review_sentences = [sentence for review in product.reviews or [] for sentence in _split_sentences(review)]
+                description_sentences = _split_sentences(product.description or "")
+                split[key] = (review_sentences, description_sentences)
+                for sentence in review_sentences + description_sentences:
+                    document_frequency.update(set(_tokenize(sentence)))
+
+            total = sum(len(reviews) + len(descriptions) for reviews, descriptions in split.values()) or 1
+            idf = {token: math.log(total / (1 + count)) + 1.0 for token, count in document_frequency.items()}
+
+            computed = {}
+            for key, (review_sentences, description_sentences) in split.items():
+                pros, cons = extract_pros_cons(review_sentences, self.max_pros_cons)
+                review_summary = self.summarizer.summarize(review_sentences, idf)
+                description_summary = self.summarizer.summarize(description_sentences, idf)
+                computed[key] = ProductSummary(
+                    key=key,
+                    description_summary=" ".join(description_summary) or None,
+                    review_summary=" ".join(review_summary) or None,
+                    pros=pros,
+                    cons=cons,
+                    review_count=len(pending[key].reviews or []),
+                )
+            logger.info(f"Summarized {len(computed)} products")
+
+            with self._lock:
+                self._summaries.update(computed)
+            if self.path:
+                self.save()
+
+        return {product.key(): self._summaries[product.key()] for product in products}
+
+    def save(self):
+        """
+        Writes all summaries to disk. The lock is held through the replace so that concurrent
+        batches never interleave writes to the temporary file.
+        """
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with self._lock:
+                data = {key: summary_codec.encode(summary) for key, summary in self._summaries.items()}
+                tmp_path = f"{self.path}.tmp"
+                with open(tmp_path, "w") as f:
+                    f.write(dumps(data))
+                os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.error(f"Error saving summary store: {e}")
+
+    def load(self):
+        """
+        Loads previously computed summaries from disk, if any.
+        """
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path) as f:
+                data = loads(f.read())
+            self._summaries = {key: summary_codec.decode(value) for key, value in data.items()}
+            logger.info(f"Loaded {len(self._summaries)} product summaries")
+        except (OSError, ValueError) as e:
+            logger.error(f"Error loading summary store: {e}")
@@ -1,8 +1,16 @@
 from utils.data_models import ProductInfo, SearchPreferences
-from typing import List
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from collections import OrderedDict
 import logging
+import time
 
-from .amazon_scraper import AmazonScraper
+import config
+from .review_summarizer import SummaryStore
+from .product_index import ProductIndex
+from .prefetch import PrefetchScheduler, query_variants
+from .review_harvester import ReviewHarvester, ReviewStore
+from .session_pool import SessionPool
+from .resilience import CircuitBreaker, FailureKind, ScraperError, failure_counters, retry_with_backoff
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
@@ -10,50 +18,235 @@ logging.getLogger('webdriver_manager').disabled = True
 logging.getLogger('selenium').disabled = True
 
 class ScraperManager:
-    def __init__(self, headless=True):
-        self.scraper = AmazonScraper(headless=True)
-        self.is_initialized = False
-
-    def ensure_initialized(self):
-        if not self.is_initialized:
-            logger.info("Initializing scraper...")
-            self.scraper.start()
-            self.scraper.navigate_to_amazon()
-            self.is_initialized = True
-            
+    def __init__(self, headless=True, sessions: int = config.SCRAPER_SESSIONS):
+        # Every browser this manager drives lives in one pool: live searches, prefetching and review harvesting
+        self.session_pool = SessionPool(size=sessions, headless=headless)
+        self.summary_store = SummaryStore(
+            path=config.SUMMARY_STORE_PATH,
+            max_sentences=config.SUMMARY_MAX_SENTENCES,
+            max_pros_cons=config.SUMMARY_MAX_PROS_CONS
+        )
+        self.product_index = ProductIndex(path=config.PRODUCT_INDEX_PATH)
+        self.prefetcher = PrefetchScheduler(idle_delay=config.PREFETCH_IDLE_DELAY, ttl=config.PREFETCH_RESULT_TTL)
+        self.circuit_breaker = CircuitBreaker(
+            window=config.CIRCUIT_BREAKER_WINDOW,
+            block_rate_threshold=config.CIRCUIT_BREAKER_BLOCK_RATE,
+            cooldown=config.CIRCUIT_BREAKER_COOLDOWN
+        )
+        self.review_harvester = ReviewHarvester(
+            self.session_pool,
+            ReviewStore(config.REVIEW_STORE_PATH),
+            max_pages=config.REVIEW_HARVEST_MAX_PAGES,
+            circuit_breaker=self.circuit_breaker
+        )
+        # Last good live results per (query, page) with the time they were scraped, served when live
+        # scraping is failing or paused and reused by the query planner while fresh
+        self._stale_results: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self._stale_served = 0
+
     def close(self):
         """Close the scraper when it's no longer needed."""
-        if self.is_initialized:
-            logger.info("Closing scraper...")
-            self.scraper.close()
-            self.is_initialized = False
+        self.prefetcher.close()
+        self.product_index.save()
+        logger.info("Closing scraper...")
+        self.session_pool.close()
     
-    def search_amazon(self, search_preferences: SearchPreferences) -> List[ProductInfo]:
+    def search_amazon(self, search_preferences: SearchPreferences, owner: Any = None) -> List[ProductInfo]:
+        """
+        `owner` identifies the conversation making the request; only its own prefetching is cancelled,
+        though prefetching for anyone is stopped if it holds the browsers this search needs.
+        """
+        self.prefetcher.cancel(owner)
+        prefetched = self.prefetcher.get(("search", search_preferences.query.lower(), search_preferences.page))
+        if prefetched is not None:
+            logger.info(f"Answered '{search_preferences.query}' page {search_preferences.page} from prefetched results")
+            return self._filter_products(prefetched, search_preferences)
+        if search_preferences.page == 1:
+            indexed = self.search_index(search_preferences, max_age=config.INDEX_MAX_AGE)
+            if len(indexed) >= config.INDEX_MIN_RESULTS:
+                logger.info(f"Answered '{search_preferences.query}' from the product index ({len(indexed)} products)")
+                return indexed
+        if not self.circuit_breaker.allow():
+            logger.warning("Circuit breaker is open, skipping live scraping")
+            return self._serve_stale(search_preferences)
         try: 
-            self.ensure_initialized()
-            products = self.scraper.search_products(search_preferences.query)
-            return self._filter_products(products, search_preferences)
-        except Exception as e:
-            logger.error(f"Error during search: {e}")
-            self.is_initialized = False
-            return []
+            products = retry_with_backoff(
+                lambda: self._live_search(search_preferences),
+                attempts=config.SCRAPE_MAX_ATTEMPTS,
+                base_delay=config.SCRAPE_RETRY_BASE_DELAY,
+                max_delay=config.SCRAPE_RETRY_MAX_DELAY,
+                retryable=lambda kind: not self.circuit_breaker.is_open(),
+                on_failure=self._on_scrape_failure
+            )
+        except ScraperError as e:
+            logger.error(f"Error during search ({e.kind.value}): {e}")
+            logger.info(f"Failure stats: {self.failure_stats()}")
+            return self._serve_stale(search_preferences)
+
+        if not products:
+            # Every product page failed to parse: not a success, and no reason to replace the last good results
+            self._on_empty_results()
+            logger.warning(f"Live search for '{search_preferences.query}' returned no products")
+            return self._serve_stale(search_preferences)
+        self.circuit_breaker.record()
+        self._stale_results[(search_preferences.query.lower(), search_preferences.page)] = (time.time(), products)
+        self._stale_results.move_to_end((search_preferences.query.lower(), search_preferences.page))
+        while len(self._stale_results) > config.STALE_CACHE_SIZE:
+            self._stale_results.popitem(last=False)
+        self._store_products(products)
+        return self._filter_products(products, search_preferences)
+
+    def _live_search(self, search_preferences: SearchPreferences) -> List[ProductInfo]:
+        """
+        One live search attempt on a pooled browser session. The pool closes a session whose attempt fails,
+        so a retry starts from a fresh one.
+        """
+        if self.session_pool.saturated():
+            # A real search never waits behind speculative work, whichever conversation it was for
+            self.prefetcher.preempt()
+        with self.session_pool.session() as scraper:
+            return scraper.search_products(search_preferences.query, start_new_session=False, page=search_preferences.page)
+
+    def _on_scrape_failure(self, kind: FailureKind):
+        self.circuit_breaker.record(kind)
+
+    def _on_empty_results(self):
+        failure_counters.record(FailureKind.UNKNOWN)
+        self._on_scrape_failure(FailureKind.UNKNOWN)
+
+    def _serve_stale(self, search_preferences: SearchPreferences) -> List[ProductInfo]:
+        """
+        Fall back to the last good results for this search, or to similar products from the index.
+        """
+        cached = self._stale_results.get((search_preferences.query.lower(), search_preferences.page))
+        if cached is None:
+            stale = self.search_index(search_preferences)
+        else:
+            stale = self._filter_products(cached[1], search_preferences)
+        if stale:
+            self._stale_served += 1
+            logger.warning(f"Serving {len(stale)} stale results for '{search_preferences.query}'")
+        return stale
+
+    def cached_results(self, page: int, matches_query: Callable[[str], bool],
+                       max_age: float = config.PLANNER_CACHE_MAX_AGE) -> Optional[Tuple[float, List[ProductInfo]]]:
+        """
+        Most recent unfiltered live results, no older than `max_age` seconds, for a cached query accepted by
+        `matches_query`, with the Unix time they were scraped.
+        """
+        now = time.time()
+        for (query, cached_page), (scraped_at, products) in reversed(list(self._stale_results.items())):
+            if cached_page == page and now - scraped_at <= max_age and matches_query(query):
+                return scraped_at, products
+        return None
+
+    def failure_stats(self) -> Dict[str, Any]:
+        """
+        Failure counters per class plus circuit breaker state.
+        """
+        return {
+            "failures": failure_counters.snapshot(),
+            "circuit_breaker": self.circuit_breaker.state,
+            "block_rate": self.circuit_breaker.block_rate(),
+            "stale_served": self._stale_served,
+        }
+
+    def _store_products(self, products: List[ProductInfo]):
+        """
+        Summarize and index freshly scraped products.
+        """
+        self.summary_store.summarize_batch(products)
+        self.product_index.add(products)
+        self.product_index.save()
+
+    def prefetch_follow_ups(self, search_preferences: SearchPreferences, results: List[ProductInfo], owner: Any = None):
+        """
+        Speculatively fetch what the next turn is likely to ask for: harvested reviews for the top
+        ranked results, the next page of results and close variants of the query.
+        """
+        top = self._top_for_reviews(results)
+        if top:
+            self.prefetcher.schedule(self._reviews_key(top), self._reviews_task(top), priority=0, owner=owner)
+
+        query = search_preferences.query
+        next_page = search_preferences.page + 1
+        self.prefetcher.schedule(("search", query.lower(), next_page), self._search_task(query, next_page),
+                                 priority=len(top), owner=owner)
+        for variant in query_variants(query):
+            self.prefetcher.schedule(("search", variant.lower(), 1), self._search_task(variant, 1),
+                                     priority=len(top) + 1, owner=owner)
+
+    def refresh_from_prefetch(self, results: List[ProductInfo]) -> List[ProductInfo]:
+        """
+        Replace current results with their prefetched, review-harvested versions where available.
+        """
+        top = self._top_for_reviews(results)
+        harvested = self.prefetcher.get(self._reviews_key(top)) if top else None
+        logger.info(f"Prefetch stats: {self.prefetcher.stats()}")
+        if not harvested:
+            return results
+        return [harvested.get(product.key(), product) for product in results]
+
+    def _top_for_reviews(self, results: List[ProductInfo]) -> List[ProductInfo]:
+        return [product for product in results if product.asin][:config.PREFETCH_TOP_PRODUCTS]
+
+    def _reviews_key(self, products: List[ProductInfo]) -> tuple:
+        # Derived from the results themselves so that agents sharing this manager do not clash
+        return ("reviews", tuple(product.key() for product in products))
+
+    def harvest_reviews(self, products: List[ProductInfo],
+                        should_stop: Optional[Callable[[], bool]] = None) -> List[ProductInfo]:
+        """
+        Harvest the full reviews listings of the given products concurrently and return the products
+        with their harvested reviews, re-summarized.
+        """
+        self.review_harvester.harvest(products, should_stop)
+        updated = [self.review_harvester.with_reviews(product, config.REVIEW_SUMMARY_LIMIT) for product in products]
+        # Only the reviews changed: re-summarize, but leave the index rows and their scrape times alone
+        self.summary_store.summarize_batch(updated, refresh=True)
+        return updated
+
+    def _reviews_task(self, products: List[ProductInfo]) -> Callable[[Callable[[], bool]], Optional[Dict[str, ProductInfo]]]:
+        def task(should_stop: Callable[[], bool]) -> Optional[Dict[str, ProductInfo]]:
+            updated = self.harvest_reviews(products, should_stop)
+            if should_stop():
+                return None
+            return {product.key(): product for product in updated}
+        return task
+
+    def _search_task(self, query: str, page: int) -> Callable[[Callable[[], bool]], Optional[List[ProductInfo]]]:
+        def task(should_stop: Callable[[], bool]) -> Optional[List[ProductInfo]]:
+            if self.circuit_breaker.is_open():
+                return None
+            try:
+                with self.session_pool.session() as scraper:
+                    # Ask for the breaker only once the request will really be made, so it is always recorded
+                    if should_stop() or not self.circuit_breaker.allow():
+                        return None
+                    products = scraper.search_products(query, start_new_session=False, page=page, should_stop=should_stop)
+            except ScraperError as e:
+                failure_counters.record(e.kind)
+                self._on_scrape_failure(e.kind)
+                return None
+            if not products and not should_stop():
+                # Every product page failed; being stopped before the first product is not a failure
+                self._on_empty_results()
+                return None
+            self.circuit_breaker.record()
+            if should_stop() or not products:
+                return None
+            self._store_products(products)
+            return products
+        return task
         
+    def search_index(self, search_preferences: SearchPreferences, k: int = 10,
+                     max_age: Optional[float] = None) -> List[ProductInfo]:
+        """
+        Find previously scraped products similar to the query that match the search filters,
+        optionally only those scraped within the last `max_age` seconds.
+        """
+        hits = self.product_index.search(search_preferences, k=k, min_similarity=config.INDEX_MIN_SIMILARITY, max_age=max_age)
+        return [product for product, _ in hits]
+
     def _filter_products(self, products: List[ProductInfo], preferences: SearchPreferences) -> List[ProductInfo]:
-        filtered_products = []
-        for product in products:
-            if preferences.price_range.minPrice and product.price < preferences.price_range.minPrice:
-                continue
-            if preferences.price_range.maxPrice and product.price > preferences.price_range.maxPrice:
-                continue
-            if preferences.rating_range:
-                if (preferences.rating_range.minRating is not None and 
-                    product.rating < preferences.rating_range.minRating):
-                    continue
-                if (preferences.rating_range.maxRating is not None and 
-                    product.rating > preferences.rating_range.maxRating):
-                    continue
-            if preferences.is_prime_eligible and not product.is_prime_eligible:
-                continue
-                
-            filtered_products.append(product)
-        return filtered_products
\ No newline at end of file
+        return [product for product in products if preferences.matches(product)]
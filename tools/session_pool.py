@@ -0,0 +1,51 @@
+import queue
+from contextlib import contextmanager
+from typing import Iterator
+
+from .amazon_scraper import AmazonScraper
+from .resilience import CaptchaDetected, FailureKind, ScraperError
+
+
+class SessionPool:
+    def __init__(self, size: int = 2, headless: bool = True):
+        """
+        A fixed pool of browser sessions shared by every scraping job: live searches, prefetching
+        and review harvesting. Sessions are started lazily on first use and kept warm until close().
+        """
+        self.size = size
+        self._scrapers = [AmazonScraper(headless=headless) for _ in range(size)]
+        self._available: "queue.Queue[AmazonScraper]" = queue.Queue()
+        for scraper in self._scrapers:
+            self._available.put(scraper)
+
+    @contextmanager
+    def session(self) -> Iterator[AmazonScraper]:
+        """
+        Borrow a running scraper from the pool, blocking until one is free.
+        A session whose job fails is closed so the next borrower gets a fresh one.
+        """
+        scraper = self._available.get()
+        try:
+            if scraper.driver is None:
+                if not scraper.start():
+                    raise ScraperError(FailureKind.DRIVER_CRASH, "Failed to start the WebDriver")
+                if not scraper.navigate_to_amazon():
+                    if scraper.is_blocked():
+                        raise CaptchaDetected()
+                    raise ScraperError(FailureKind.NAVIGATION, "Failed to navigate to Amazon")
+            yield scraper
+        except Exception:
+            scraper.close()
+            raise
+        finally:
+            self._available.put(scraper)
+
+    def saturated(self) -> bool:
+        """
+        Whether every session is currently borrowed.
+        """
+        return self._available.empty()
+
+    def close(self):
+        for scraper in self._scrapers:
+            scraper.close()
@@ -17,6 +17,30 @@ class ProductInfo(BaseModel):
     is_prime_eligible: bool;
     description: Optional[str] = None
     reviews: Optional[List[str]] = None
+    asin: Optional[str] = None
+    url: Optional[str] = None
+
+    def key(self) -> str:
+        """
+        Stable identifier for the product, used to look up precomputed data such as summaries.
+        """
+        return self.asin or self.product_name
+
+
+class Review(BaseModel):
+    asin: str
+    text: str
+    rating: Optional[float] = None
+    date: Optional[str] = None
+
+
+class ProductSummary(BaseModel):
+    key: str
+    description_summary: Optional[str] = None
+    review_summary: Optional[str] = None
+    pros: List[str] = Field(default_factory=list)
+    cons: List[str] = Field(default_factory=list)
+    review_count: int = 0
 
 
 class SearchPreferences(BaseModel):
@@ -24,11 +48,28 @@ class SearchPreferences(BaseModel):
     price_range: PriceRange = Field(default_factory=PriceRange, description="The price range for the product")
     rating_range: RatingRange = Field(default_factory=RatingRange, description="The rating range for the product")
     is_prime_eligible: bool = Field(default=False, description="Whether to show only prime eligible products")
+    page: int = Field(default=1, description="The page of search results to fetch")
     ## TODO: Add more fields.
 
     def to_dict(self) -> Dict[str, Any]:
         return self.model_dump(exclude_none=True)
 
+    def matches(self, product: ProductInfo) -> bool:
+        """
+        Whether a product satisfies the price, rating and Prime filters.
+        """
+        if self.price_range.minPrice and product.price < self.price_range.minPrice:
+            return False
+        if self.price_range.maxPrice and product.price > self.price_range.maxPrice:
+            return False
+        if self.rating_range.minRating is not None and product.rating < self.rating_range.minRating:
+            return False
+        if self.rating_range.maxRating is not None and product.rating > self.rating_range.maxRating:
+            return False
+        if self.is_prime_eligible and not product.is_prime_eligible:
+            return False
+        return True
+
     def to_search_filters(self) -> Dict[str, Any]:
         filters = {}
         filters["price_range"] = self.price_range
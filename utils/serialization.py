@@ -0,0 +1,138 @@
+import json
+import os
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Type, Union, get_args, get_origin
+
+from pydantic import BaseModel, TypeAdapter
+
+from utils.data_models import AgentContext, ProductInfo, ProductSummary, SearchPreferences
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is optional, the stdlib json module is the fallback
+    orjson = None
+
+# Per-field character budgets for text sent to the model. List fields are budgeted per item,
+# with `max_items` capping the number of items kept.
+TOOL_MESSAGE_BUDGETS: Dict[str, int] = {
+    "product_name": 160,
+    "description": 400,
+    "review_summary": 400,
+    "pros": 160,
+    "cons": 160,
+    "reviews": 240,
+}
+MAX_LIST_ITEMS = 5
+
+
+def dumps(obj: Any) -> str:
+    """
+    Serialize to a compact JSON string, using orjson when it is installed.
+    """
+    if orjson is not None:
+        return orjson.dumps(obj).decode("utf-8")
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False)
+
+
+def loads(data: Any) -> Any:
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _is_list(annotation: Any) -> bool:
+    if get_origin(annotation) is list:
+        return True
+    return get_origin(annotation) is Union and any(_is_list(arg) for arg in get_args(annotation))
+
+
+def _truncate(text: str, budget: int) -> str:
+    return text if len(text) <= budget else text[:budget - 1].rstrip() + "…"
+
+
+class ModelCodec:
+    def __init__(self, model: Type[BaseModel], budgets: Optional[Dict[str, int]] = None,
+                 exclude: Iterable[str] = (), max_items: int = MAX_LIST_ITEMS):
+        """
+        Encoder for a pydantic model built on pydantic-core: nulls and excluded fields are dropped by
+        dump_python, then empty lists are omitted and only the fields with a budget are truncated.
+        """
+        self.model = model
+        self.budgets = budgets or {}
+        self.max_items = max_items
+        exclude = set(exclude)
+        fields = [name for name in model.model_fields if name not in exclude]
+        self.exclude = exclude or None
+        self._adapter = TypeAdapter(List[model])
+        self._budgeted: List[Tuple[str, int]] = [(name, self.budgets[name]) for name in fields if name in self.budgets]
+        self._lists = [name for name in fields if _is_list(model.model_fields[name].annotation)]
+
+    def encode(self, instance: BaseModel) -> Dict[str, Any]:
+        return self.encode_many([instance])[0]
+
+    def encode_many(self, instances: List[BaseModel]) -> List[Dict[str, Any]]:
+        encoded = self._adapter.dump_python(instances, exclude={"__all__": self.exclude} if self.exclude else None,
+                                            exclude_none=True)
+        for data in encoded:
+            for name in self._lists:
+                if data.get(name) == []:
+                    del data[name]
+            for name, budget in self._budgeted:
+                value = data.get(name)
+                if isinstance(value, str):
+                    if len(value) > budget:
+                        data[name] = _truncate(value, budget)
+                elif value is not None:
+                    data[name] = [_truncate(item, budget) for item in value[:self.max_items]]
+        return encoded
+
+    def decode(self, data: Dict[str, Any]) -> BaseModel:
+        # Validation runs in pydantic-core and is faster than model_construct's Python-level defaults
+        return self.model.model_validate(data)
+
+
+product_codec = ModelCodec(ProductInfo)
+summary_codec = ModelCodec(ProductSummary)
+tool_product_codec = ModelCodec(ProductInfo, budgets=TOOL_MESSAGE_BUDGETS, exclude=("description", "reviews", "url"))
+tool_summary_codec = ModelCodec(ProductSummary, budgets=TOOL_MESSAGE_BUDGETS, exclude=("key",))
+
+
+def encode_preferences(preferences: SearchPreferences) -> Dict[str, Any]:
+    return preferences.model_dump(exclude_none=True, exclude_defaults=True)
+
+
+def decode_preferences(data: Dict[str, Any]) -> SearchPreferences:
+    return SearchPreferences(**data)
+
+
+def save_context(context: AgentContext, path: str):
+    """
+    Persist an agent session (preferences, results and conversation history) to disk.
+    """
+    data = {
+        "current_preferences": encode_preferences(context.current_preferences) if context.current_preferences else None,
+        "current_results": product_codec.encode_many(context.current_results),
+        "conversation_history": context.conversation_history,
+        "has_active_search": context.has_active_search,
+    }
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(dumps(data))
+    os.replace(tmp_path, path)
+
+
+def load_context(path: str) -> AgentContext:
+    """
+    Restore an agent session saved with save_context.
+    """
+    with open(path, encoding="utf-8") as f:
+        data = loads(f.read())
+    context = AgentContext()
+    if data.get("current_preferences") is not None:
+        context.current_preferences = decode_preferences(data["current_preferences"])
+    context.current_results = [product_codec.decode(product) for product in data.get("current_results", [])]
+    context.conversation_history = data.get("conversation_history", [])
+    context.has_active_search = data.get("has_active_search", False)
+    return context